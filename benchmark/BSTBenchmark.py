@@ -0,0 +1,47 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Benchmark bulk loads into common.BST, compare plain and balanced trees with
+sorted and random key orders, and the O(n) bulk constructors.
+
+Usage: python benchmark/BSTBenchmark.py [count]
+'''
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.BST import BST
+
+# plain tree turns into a linked list on sorted input, each insert walks the
+# whole list, so loading is O(n^2) and only a small prefix is loaded then.
+DEGENERATE_LIMIT = 500
+
+def bulk_load(build, values, balanced):
+    start = time.time()
+    tree = build(values, balanced=balanced)
+    return tree, time.time() - start
+
+def report(name, values, balanced, build=BST):
+    tree, elapsed = bulk_load(build, values, balanced)
+    print '%-24s keys: %8d  height: %6d  time: %8.3fs  %10.0f keys/s' % (
+        name, len(values), tree.height(), elapsed, len(values) / max(elapsed, 1e-9))
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    random.seed(0)
+    ordered = range(count)
+    shuffled = list(ordered)
+    random.shuffle(shuffled)
+
+    report('plain, random', shuffled, False)
+    report('plain, sorted', ordered[:DEGENERATE_LIMIT], False)
+    report('balanced, random', shuffled, True)
+    report('balanced, sorted', ordered, True)
+    report('bulk_load, random', shuffled, True, BST.bulk_load)
+    report('from_sorted, sorted', ordered, True, BST.from_sorted)
@@ -0,0 +1,85 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Compare memory use and insert/search throughput of common.BST nodes with
+slots against the object per node layout with a dict per node.
+
+Memory is measured with tracemalloc when it is available (python 3), else
+estimated from sys.getsizeof of every node.
+
+Usage: python benchmark/BSTMemoryBenchmark.py [count]
+'''
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.BST import BST
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+class DictNode(object):
+    '''
+    Node layout from before, with a __dict__ and an eager extra dict.
+    '''
+
+    def __init__(self, value):
+        self.value = value
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.height = 1
+        self.size = 1
+        self.deleted = False
+        self.extra = {}
+
+class DictBST(BST):
+
+    def insert(self, value):
+        node = DictNode(value)
+        if self._insert(node) is node:
+            self.count += 1
+
+def estimate_size(tree):
+    size = 0
+    for node in tree.inorder():
+        size += sys.getsizeof(node)
+        if hasattr(node, '__dict__'):
+            size += sys.getsizeof(node.__dict__) + sys.getsizeof(node.extra)
+    return size
+
+def run(name, cls, values):
+    if tracemalloc is not None:
+        tracemalloc.start()
+    start = time.time()
+    tree = cls(values)
+    insert_time = time.time() - start
+    if tracemalloc is not None:
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    else:
+        size = estimate_size(tree)
+    start = time.time()
+    for value in values:
+        tree.search(value)
+    search_time = time.time() - start
+    count = len(values)
+    print '%-6s %6.1f bytes/node  insert: %9.0f keys/s  search: %9.0f keys/s' % (
+        name, float(size) / count, count / insert_time, count / search_time)
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 5
+    random.seed(0)
+    values = range(count)
+    random.shuffle(values)
+
+    run('dict', DictBST, values)
+    run('slots', BST, values)
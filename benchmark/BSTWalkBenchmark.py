@@ -0,0 +1,76 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Micro benchmark of the iterative walks in common.BST against the recursive
+insert and height they replaced.
+
+Usage: python benchmark/BSTWalkBenchmark.py [count]
+'''
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.BST import BST, Node
+
+class RecursiveBST(BST):
+    '''
+    The recursive insert and height from before, kept here for comparison.
+    '''
+
+    def insert(self, value):
+        self.count += 1
+        node = Node(value)
+        self.root = self._insert_recursive(node, self.root)
+
+    def _insert_recursive(self, node, root):
+        if root is None:
+            return node
+        if node.value < root.value:
+            root.left = self._insert_recursive(node, root.left)
+            if root.left == node:
+                node.parent = root
+        elif node.value > root.value:
+            root.right = self._insert_recursive(node, root.right)
+            if root.right == node:
+                node.parent = root
+        return root
+
+    def height(self):
+        return self._height(self.root)
+
+    def _height(self, root):
+        if root is None:
+            return 0
+        return max(self._height(root.left), self._height(root.right)) + 1
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return result, time.time() - start
+
+def run(name, cls, values):
+    tree, insert_time = timed(cls, values)
+    height, height_time = timed(tree.height)
+    print '%-10s insert: %7.3fus/key  height: %7.3fms (height %d)' % (
+        name, insert_time / len(values) * 1e6, height_time * 1e3, height)
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 5
+    random.seed(0)
+    values = range(count)
+    random.shuffle(values)
+
+    run('recursive', RecursiveBST, values)
+    run('iterative', BST, values)
+
+    tree = BST(values)
+    start = time.time()
+    for value in values:
+        tree.search(value)
+    print 'search: %7.3fus/key' % ((time.time() - start) / count * 1e6)
@@ -0,0 +1,324 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Reproducible benchmark suite for common.BST, LowestCommonAncestor,
+MatrixFill and CircularSortedArray.
+
+Every workload is generated from a seeded random generator, so two runs with
+the same seed and scale do the same work. Each workload runs in a process of
+its own, first once to warm up and then at least the given number of times
+and for at least MIN_SECONDS, so short workloads get more samples. Each
+operation is timed alone, the report gives the median throughput of the
+repeats, p50 latency as the median of the per repeat p50 and p99 latency of
+all operations together, and peak memory of the workload (traced allocations
+if tracemalloc is available, else how much peak RSS of its process grew
+above what the interpreter and imported modules took before the workload).
+
+Shared machines change speed over minutes, which no number of repeats
+evens out. Right before every repeat a fixed loop of plain python is timed,
+and comparisons against a baseline use throughput and p50 latency of each
+repeat scaled by the time of its loop, in calibration units.
+
+Results are saved as JSON. Given a baseline, i.e. results of an earlier
+run, workloads whose median throughput or p50 latency got worse by more than
+the tolerance are reported and the run exits with status 1.
+
+Usage: python benchmark/Benchmark.py [--seed N] [--scale X] [--only PREFIX]
+                                     [--repeats N] [--output FILE]
+                                     [--baseline FILE] [--tolerance FRACTION]
+'''
+
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+from timeit import default_timer as timer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'problems'))
+
+from common.BST import BST
+from CircularSortedArray import find, find_rotation_point
+from LowestCommonAncestor import LowestCommonAncestor
+from MatrixFill import MatrixFill
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# values in trees of the BST and LCA workloads, at scale 1
+TREE_SIZE = 20000
+# plain trees degenerate on sorted and adversarial orders, insert is O(n)
+DEGENERATE_SIZE = 2000
+LOOKUPS = 20000
+MATRIX_SHAPES = [(100, 100), (300, 300), (100, 1000)]
+MATRIX_DENSITIES = [('dense', 0.05), ('sparse', 0.0005)]
+MATRIX_REPEATS = 10
+ARRAY_SIZE = 10 ** 6
+# iterations of the loop timing how fast the machine currently is
+CALIBRATION_LOOP = 200000
+# repeat workloads until they ran this long, at most MAX_REPEATS times
+MIN_SECONDS = 0.2
+MAX_REPEATS = 100
+
+def key_order(rand, size, order):
+    keys = list(range(size))
+    if order == 'random':
+        rand.shuffle(keys)
+    elif order == 'adversarial':
+        # zigzag between both ends, a degenerate plain tree and lots of
+        # rotations in a balanced one
+        keys = [keys[i // 2] if i % 2 == 0 else keys[-(i // 2) - 1] for i in range(size)]
+    return keys
+
+def bst_insert(order, balanced):
+    def setup(rand, scale):
+        size = TREE_SIZE if balanced or order == 'random' else DEGENERATE_SIZE
+        tree = BST([], balanced=balanced)
+        return tree.insert, [(key,) for key in key_order(rand, int(size * scale), order)]
+    return setup
+
+def bst_search(rand, scale):
+    size = int(TREE_SIZE * scale)
+    tree = BST(key_order(rand, size, 'random'))
+    return tree.search, [(rand.randrange(size * 2),) for _ in range(int(LOOKUPS * scale))]
+
+def lca_find(rand, scale):
+    size = int(TREE_SIZE * scale)
+    tree = BST(key_order(rand, size, 'random'))
+    pairs = [(tree, rand.randrange(size), rand.randrange(size)) for _ in range(int(LOOKUPS * scale))]
+    return LowestCommonAncestor.find, pairs
+
+def matrix_fill(shape, density):
+    def setup(rand, scale):
+        rows, columns = shape
+        rows = max(1, int(rows * scale))
+        matrix = [[0] * columns for _ in range(rows)]
+        for _ in range(max(1, int(rows * columns * density))):
+            matrix[rand.randrange(rows)][rand.randrange(columns)] = 1
+        return MatrixFill.fill, [(copy.deepcopy(matrix),) for _ in range(MATRIX_REPEATS)]
+    return setup
+
+def circular_find(rand, scale):
+    size = int(ARRAY_SIZE * scale)
+    shift = rand.randrange(size)
+    array = list(range(shift, size)) + list(range(shift))
+    pivot = find_rotation_point(array)
+    keys = [rand.randrange(-size // 10, size) for _ in range(int(LOOKUPS * scale))]
+    return find, [(array, key, pivot) for key in keys]
+
+def workloads():
+    result = []
+    for order in ('random', 'sorted', 'adversarial'):
+        result.append(('bst.insert.%s' % order, bst_insert(order, False)))
+        result.append(('bst.insert.%s.balanced' % order, bst_insert(order, True)))
+    result.append(('bst.search', bst_search))
+    result.append(('lca.find', lca_find))
+    for rows, columns in MATRIX_SHAPES:
+        for name, density in MATRIX_DENSITIES:
+            result.append(('matrix.fill.%s.%dx%d' % (name, rows, columns),
+                           matrix_fill((rows, columns), density)))
+    result.append(('circular.find', circular_find))
+    return result
+
+def percentile(ordered, percent):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100.0))]
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2.0
+
+def peak_memory_kb():
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def calibrate():
+    start = timer()
+    total = 0
+    for i in xrange(CALIBRATION_LOOP):
+        total += i & 7
+    return timer() - start
+
+def timer_resolution():
+    # smallest step of timer, p50 of short operations is rounded to it
+    step = None
+    for _ in range(10):
+        start = timer()
+        now = timer()
+        while now == start:
+            now = timer()
+        step = now - start if step is None else min(step, now - start)
+    return step
+
+def run_once(setup, seed, scale):
+    # every repeat gets fresh data, workloads like insert change it
+    func, calls = setup(random.Random(seed), scale)
+    latencies = []
+    start = timer()
+    for args in calls:
+        begin = timer()
+        func(*args)
+        latencies.append(timer() - begin)
+    return timer() - start, latencies
+
+def measure(setup, seed, scale, repeats):
+    '''
+    Warm up, then run the workload repeats times or more. Run it in a fresh
+    process, peak RSS is only meaningful for the first workload of a process.
+    '''
+    # peak RSS never goes down, so count only what the workload added
+    baseline = peak_memory_kb()
+    run_once(setup, seed, scale)
+    if tracemalloc is not None:
+        tracemalloc.start()
+    runs = []
+    calibrations = []
+    while len(runs) < repeats or (sum(elapsed for elapsed, _ in runs) < MIN_SECONDS
+                                  and len(runs) < MAX_REPEATS):
+        calibrations.append(calibrate())
+        runs.append(run_once(setup, seed, scale))
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    else:
+        peak = peak_memory_kb() - baseline
+    latencies = sorted(latency for _, run in runs for latency in run)
+    operations = len(runs[0][1])
+    throughputs = [operations / elapsed if elapsed else 0.0 for elapsed, _ in runs]
+    p50s = [percentile(sorted(run), 50) for _, run in runs]
+    return {
+        'operations': operations,
+        'repeats': len(runs),
+        'seconds': median([elapsed for elapsed, _ in runs]),
+        'throughput': median(throughputs),
+        'best_throughput': max(throughputs),
+        'p50': median(p50s),
+        'p99': percentile(latencies, 99),
+        'peak_memory_kb': peak,
+        'calibration': median(calibrations),
+        'resolution': timer_resolution(),
+        # operations per calibration loop, and p50 in calibration loops
+        'relative_throughput': median([t * c for t, c in zip(throughputs, calibrations)]),
+        'relative_p50': median([p / c for p, c in zip(p50s, calibrations)]),
+    }
+
+def measure_in_process(name, args):
+    '''
+    Measure one workload in a child process, so it starts with fresh memory
+    and does not see caches and garbage of other workloads.
+    '''
+    command = [sys.executable, os.path.abspath(__file__), '--workload', name,
+               '--seed', str(args.seed), '--scale', repr(args.scale),
+               '--repeats', str(args.repeats)]
+    child = subprocess.Popen(command, stdout=subprocess.PIPE)
+    output = child.communicate()[0]
+    if child.returncode:
+        raise RuntimeError('workload %s failed with status %d' % (name, child.returncode))
+    return json.loads(output)
+
+def compare(results, baseline, tolerance):
+    '''
+    Return descriptions of workloads slower than baseline by more than
+    tolerance, in calibration units if both runs have them.
+    '''
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if 'relative_throughput' in result and 'relative_throughput' in base:
+            throughput = result['relative_throughput'] / base['relative_throughput']
+            p50 = result['relative_p50'] / base['relative_p50']
+        else:
+            throughput = result['throughput'] / base['throughput']
+            p50 = result['p50'] / base['p50']
+        if throughput < 1 - tolerance:
+            regressions.append('%s: throughput %.0f ops/s, %.0f%% of baseline %.0f ops/s' % (
+                name, result['throughput'], throughput * 100, base['throughput']))
+        # a couple of timer steps is rounding, not a regression
+        slack = 2 * max(result.get('resolution', 0), base.get('resolution', 0))
+        if p50 > 1 + tolerance and result['p50'] - base['p50'] > slack:
+            regressions.append('%s: p50 %.2fus, %.0f%% of baseline %.2fus' % (
+                name, result['p50'] * 1e6, p50 * 100, base['p50'] * 1e6))
+    return regressions
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Run seeded benchmarks.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiply workload sizes')
+    parser.add_argument('--only', default='',
+                        help='run workloads whose name starts with this')
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='timed runs of each workload after a warm up run')
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--baseline', help='compare with results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown against baseline, 0.2 is 20%%')
+    # used by measure_in_process to run one workload in a child process
+    parser.add_argument('--workload', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.workload:
+        setup = dict(workloads())[args.workload]
+        print json.dumps(measure(setup, args.seed, args.scale, args.repeats))
+        return 0
+
+    results = {}
+    print '%-34s %8s %12s %10s %10s %10s' % ('workload', 'ops', 'ops/s', 'p50 us', 'p99 us', 'peak +KB')
+    for name, setup in workloads():
+        if not name.startswith(args.only):
+            continue
+        result = results[name] = measure_in_process(name, args)
+        print '%-34s %8d %12.0f %10.2f %10.2f %10d' % (
+            name, result['operations'], result['throughput'], result['p50'] * 1e6,
+            result['p99'] * 1e6, result['peak_memory_kb'])
+
+    report = {
+        'seed': args.seed,
+        'scale': args.scale,
+        'repeats': args.repeats,
+        'python': platform.python_version(),
+        'memory': 'tracemalloc' if tracemalloc is not None else 'maxrss growth',
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline.get('seed'), baseline.get('scale')) != (args.seed, args.scale):
+            print 'WARNING: baseline ran with seed %s scale %s' % (baseline.get('seed'), baseline.get('scale'))
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if regressions:
+            print
+            print 'PERFORMANCE REGRESSIONS against %s:' % args.baseline
+            for regression in regressions:
+                print '  ' + regression
+            return 1
+        print 'No regressions against %s' % args.baseline
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,58 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Compare search in a circular sorted array against a linear scan, and batch
+lookups with find_many against a loop of find.
+
+Usage: python benchmark/CircularSortedArrayBenchmark.py [size] [lookups]
+'''
+
+import array
+import os
+import random
+import sys
+import time
+
+import numpy
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'problems'))
+
+from CircularSortedArray import find, find_many, find_rotation_point
+
+def linear_find(values, elem):
+    try:
+        return values.index(elem)
+    except ValueError:
+        return -1
+
+def run(name, search, keys):
+    start = time.time()
+    for key in keys:
+        search(key)
+    elapsed = time.time() - start
+    print '%-18s %12.3fus/lookup' % (name, elapsed / len(keys) * 1e6)
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 7
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 10 ** 4
+    random.seed(0)
+    shift = random.randrange(size)
+    values = array.array('l', xrange(shift, size))
+    values.extend(xrange(shift))
+    keys = [random.randrange(-size // 10, size) for _ in range(lookups)]
+
+    pivot = find_rotation_point(values)
+    run('find', lambda key: find(values, key), keys)
+    run('find, pivot', lambda key: find(values, key, pivot), keys)
+    # a linear scan is too slow to repeat for every key
+    run('linear scan', lambda key: linear_find(values, key), keys[:20])
+
+    numpy_values = numpy.frombuffer(values, dtype=numpy.dtype('l'))
+    numpy_keys = numpy.array(keys)
+    for backend, data, queries in (('python', values, keys), ('numpy', numpy_values, numpy_keys)):
+        start = time.time()
+        find_many(data, queries, backend=backend)
+        elapsed = time.time() - start
+        print '%-18s %12.3fus/lookup' % ('find_many, ' + backend, elapsed / len(keys) * 1e6)
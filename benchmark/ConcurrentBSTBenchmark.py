@@ -0,0 +1,75 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Measure read throughput of a tree shared by threads under a mixed read and
+write load: common.BST behind one global lock against ConcurrentBST with
+lock free readers.
+
+Usage: python benchmark/ConcurrentBSTBenchmark.py [readers] [seconds]
+'''
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.BST import BST
+from common.ConcurrentBST import ConcurrentBST
+
+SIZE = 10 ** 5
+
+class LockedBST(object):
+    '''
+    common.BST with every call under one global lock.
+    '''
+
+    def __init__(self, values):
+        self.lock = threading.Lock()
+        self.tree = BST(values, balanced=True)
+
+    def insert(self, value):
+        with self.lock:
+            self.tree.insert(value)
+
+    def search(self, value):
+        with self.lock:
+            return self.tree.search(value)
+
+def run(name, tree, readers, seconds):
+    stop = threading.Event()
+    reads = [0] * readers
+
+    def read(slot):
+        rand = random.Random(slot)
+        while not stop.is_set():
+            for _ in range(100):
+                tree.search(rand.randrange(SIZE * 2))
+            reads[slot] += 100
+
+    def write():
+        rand = random.Random(-1)
+        while not stop.is_set():
+            tree.insert(rand.randrange(SIZE * 2))
+
+    threads = [threading.Thread(target=read, args=(slot,)) for slot in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    print '%-14s %d readers: %10.0f reads/s' % (name, readers, sum(reads) / seconds)
+
+if __name__ == '__main__':
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+    random.seed(0)
+    values = random.sample(xrange(SIZE * 2), SIZE)
+    run('locked BST', LockedBST(values), readers, seconds)
+    run('ConcurrentBST', ConcurrentBST(values), readers, seconds)
@@ -0,0 +1,38 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Compare lookups in a live common.BST against its frozen Eytzinger layout,
+one by one and in a numpy batch.
+
+Usage: python benchmark/FrozenBSTBenchmark.py [count] [lookups]
+'''
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.BST import BST
+
+def run(name, func, keys):
+    start = time.time()
+    func(keys)
+    elapsed = time.time() - start
+    print '%-20s %10.0f lookups/s' % (name, len(keys) / elapsed)
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 10 ** 5
+    random.seed(0)
+    tree = BST.bulk_load(random.sample(xrange(count * 2), count))
+    frozen = tree.freeze()
+    keys = [random.randrange(count * 2) for _ in range(lookups)]
+
+    print 'frozen keys: %d bytes for %d values' % (frozen.keys.itemsize * len(frozen.keys), count)
+    run('BST.search', lambda keys: [tree.search(key) for key in keys], keys)
+    run('FrozenBST.contains', lambda keys: [frozen.contains(key) for key in keys], keys)
+    run('lookup_many', frozen.lookup_many, keys)
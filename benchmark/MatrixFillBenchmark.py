@@ -0,0 +1,51 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Compare python and numpy backends of MatrixFill.fill, and the packed
+BitMatrix, across matrix sizes and densities of 1s, and check all of them
+give the same result.
+
+Usage: python benchmark/MatrixFillBenchmark.py [size ...]
+'''
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'problems'))
+
+import numpy
+
+from MatrixFill import BitMatrix, MatrixFill
+
+DENSITIES = [0.0001, 0.001, 0.01]
+
+def random_matrix(size, density):
+    matrix = [[0] * size for _ in range(size)]
+    for _ in range(int(size * size * density)):
+        matrix[random.randrange(size)][random.randrange(size)] = 1
+    return matrix
+
+def timed(func, *args, **kwargs):
+    start = time.time()
+    result = func(*args, **kwargs)
+    return result, time.time() - start
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 500, 1000, 2000]
+    random.seed(0)
+    for size in sizes:
+        for density in DENSITIES:
+            matrix = random_matrix(size, density)
+            array = numpy.array(matrix, dtype=numpy.uint8)
+            bits = BitMatrix.from_lists(matrix)
+            expected, python_time = timed(MatrixFill.fill, matrix)
+            result, numpy_time = timed(MatrixFill.fill, array, backend='numpy')
+            assert result.tolist() == expected
+            bits, bits_time = timed(MatrixFill.fill, bits)
+            assert bits.to_lists() == expected
+            print '%5dx%-5d density: %6.4f  python: %8.4fs  numpy: %8.4fs  bits: %8.4fs' % (
+                size, size, density, python_time, numpy_time, bits_time)
@@ -0,0 +1,45 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Measure how MatrixFill.fill_parallel scales with the number of worker
+processes, against the sequential MatrixFill.fill.
+
+Usage: python benchmark/MatrixFillParallelBenchmark.py [rows] [columns]
+'''
+
+import copy
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'problems'))
+
+from MatrixFill import MatrixFill
+
+WORKERS = [1, 2, 4, 8]
+DENSITY = 0.0001
+
+def timed(func, *args, **kwargs):
+    start = time.time()
+    result = func(*args, **kwargs)
+    return result, time.time() - start
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    random.seed(0)
+    matrix = [[0] * columns for _ in range(rows)]
+    for _ in range(int(rows * columns * DENSITY)):
+        matrix[random.randrange(rows)][random.randrange(columns)] = 1
+
+    expected, sequential = timed(MatrixFill.fill, copy.deepcopy(matrix))
+    print '%dx%d, %d cpus' % (rows, columns, multiprocessing.cpu_count())
+    print 'sequential fill:        %8.3fs' % sequential
+    for workers in WORKERS:
+        result, elapsed = timed(MatrixFill.fill_parallel, copy.deepcopy(matrix), workers=workers)
+        assert result == expected
+        print 'fill_parallel, %d workers: %8.3fs' % (workers, elapsed)
@@ -13,171 +13,716 @@ Implement binary search tree.
 class Node(object):
     '''
     Implement tree node
+
+    Use slots so a node costs no per instance dict, big trees hold lots
+    of them.
     '''
 
+    __slots__ = ('value', 'left', 'right', 'parent', 'height', 'size', 'deleted', '_extra')
+
     def __init__(self, value):
         self.value = value
         self.left = None
         self.right = None
         self.parent = None
-        # store some extra information for debug or test
-        self.extra = {}
+        # height of the sub tree rooted at this node, only maintained by
+        # balanced trees
+        self.height = 1
+        # number of nodes in the sub tree rooted at this node, only
+        # maintained by trees with order statistics
+        self.size = 1
+        # tombstone of lazy deletion, node stays in tree but value does not
+        self.deleted = False
+        self._extra = None
+
+    @property
+    def extra(self):
+        '''
+        Store some extra information for debug or test, created on first use.
+        '''
+        if self._extra is None:
+            self._extra = {}
+        return self._extra
+
+def _height_of(node):
+    if node is None:
+        return 0
+    return node.height
+
+def _size_of(node):
+    if node is None:
+        return 0
+    return node.size
 
 class BST(object):
     '''
     Implement binary search tree
+
+    If balanced is True, the tree keeps itself balanced with AVL rotations,
+    so height stays O(log n) even if values are inserted in sorted order.
+
+    If order_statistics is True, every node tracks the size of its sub tree,
+    so rank, select and count_range cost O(h) instead of a full traversal.
+
+    If lazy_delete is True, delete only marks the node as deleted, and the
+    tree is rebuilt without deleted nodes once they are more than
+    rebuild_fraction of all its nodes. count never includes deleted nodes,
+    height does, as they are still walked through.
     '''
 
-    def __init__(self, values):
+    def __init__(self, values, balanced=False, order_statistics=False,
+                 lazy_delete=False, rebuild_fraction=0.5):
         self.root = None
         self.count = 0
+        self.balanced = balanced
+        self.order_statistics = order_statistics
+        self.lazy_delete = lazy_delete
+        self.rebuild_fraction = rebuild_fraction
+        # number of nodes marked as deleted
+        self.tombstones = 0
+        # number of rotations done so far
+        self.rotations = 0
+        # common.Instrumentation.Stats recording operations, None to skip
+        self.stats = None
+        # objects told about changes of tree structure, by node_added(node)
+        # when a leaf is added and tree_changed() for anything else
+        self.observers = []
         for value in values:
             self.insert(value)
 
+    @classmethod
+    def from_sorted(cls, values, **options):
+        '''
+        Build a perfectly balanced tree from values in ascending order in
+        O(n), duplicated values are dropped.
+        '''
+        nodes = []
+        for value in values:
+            if nodes:
+                last = nodes[-1].value
+                if value < last:
+                    raise ValueError('values are not sorted: %r after %r' % (value, last))
+                if not value > last:
+                    continue
+            nodes.append(Node(value))
+        tree = cls([], **options)
+        tree._build(nodes)
+        return tree
+
+    @classmethod
+    def bulk_load(cls, values, **options):
+        '''
+        Build a perfectly balanced tree from values in any order, values are
+        sorted first so it costs O(n log n), or O(n) if already sorted.
+        '''
+        return cls.from_sorted(sorted(values), **options)
+
+    def _build(self, nodes):
+        '''
+        Link nodes, sorted by value, into a perfectly balanced tree, the
+        middle node of each range becomes the root of that range.
+        '''
+        self.root = None
+        self.count = len(nodes)
+        self.tombstones = 0
+        self._tree_changed()
+        stack = [(0, len(nodes), None, False)]
+        while stack:
+            low, high, parent, is_left = stack.pop()
+            if low >= high:
+                continue
+            middle = (low + high) // 2
+            node = nodes[middle]
+            node.parent = parent
+            node.left = None
+            node.right = None
+            # height of a range built this way only depends on its size
+            node.height = (high - low).bit_length()
+            node.size = high - low
+            if parent is None:
+                self.root = node
+            elif is_left:
+                parent.left = node
+            else:
+                parent.right = node
+            stack.append((middle + 1, high, node, False))
+            stack.append((low, middle, node, True))
+
     def insert(self, value):
-        # TODO if already in tree, do not add count
-        self.count += 1
+        if self.stats is not None:
+            return self._measure('insert', value, self._insert_value)
+        return self._insert_value(value)
+
+    def insert_many(self, values):
+        '''
+        Insert a batch of values. The batch is sorted and merged with the
+        values already in tree, then the whole tree is built again in
+        O(n + k) plus sorting. Only a balanced tree, whose inserts are known
+        to cost O(log n), takes a batch small compared to the tree one value
+        at a time in O(k log n).
+        '''
+        batch = []
+        for value in sorted(values):
+            if not batch or batch[-1] < value:
+                batch.append(value)
+        size = self.count + self.tombstones
+        if self.balanced and len(batch) * size.bit_length() < size:
+            for value in batch:
+                self.insert(value)
+            return
+        existing = [node for node in self._nodes() if not node.deleted]
+        nodes = []
+        i = 0
+        for value in batch:
+            while i < len(existing) and existing[i].value < value:
+                nodes.append(existing[i])
+                i += 1
+            if i < len(existing) and not value < existing[i].value:
+                # value already in tree, keep its node
+                continue
+            nodes.append(Node(value))
+        nodes.extend(existing[i:])
+        self._build(nodes)
+
+    def _insert_value(self, value):
         node = Node(value)
-        self.root = self._insert(node, self.root)
+        found = self._insert(node)
+        if found is not node:
+            if found.deleted:
+                # value was deleted lazily, bring it back
+                found.deleted = False
+                self.tombstones -= 1
+                self.count += 1
+                self._resize(found, 1)
+            return
+        self.count += 1
+        self._resize(node.parent, 1)
+        for observer in self.observers:
+            observer.node_added(node)
+        if self.balanced:
+            self._rebalance(node.parent)
+
+    def _tree_changed(self):
+        for observer in self.observers:
+            observer.tree_changed()
+
+    def _resize(self, node, delta):
+        # add delta to sizes of node and all its ancestors
+        if self.order_statistics:
+            while node is not None:
+                node.size += delta
+                node = node.parent
 
-    def _insert(self, node, root):
-        if root is None:
+    def _insert(self, node):
+        '''
+        Hang node as a new leaf and return it, if value is already in tree
+        return the node holding it instead. Walk down iteratively and only
+        link the new leaf to its parent, no child pointer is reassigned on
+        the way.
+        '''
+        parent = self.root
+        if parent is None:
+            self.root = node
             return node
-        if node.value < root.value:
-            root.left = self._insert(node, root.left)
-            if root.left == node:
-                node.parent = root
-        elif node.value > root.value:
-            root.right = self._insert(node, root.right)
-            if root.right == node:
-                node.parent = root
-        return root
+        value = node.value
+        while True:
+            if value < parent.value:
+                if parent.left is None:
+                    parent.left = node
+                    break
+                parent = parent.left
+            elif value > parent.value:
+                if parent.right is None:
+                    parent.right = node
+                    break
+                parent = parent.right
+            else:
+                return parent
+        node.parent = parent
+        return node
 
-    def height(self):
-        return self._height(self.root)
+    def delete(self, value):
+        '''
+        Delete value from tree, return False if it is not in tree.
+        '''
+        if self.stats is not None:
+            return self._measure('delete', value, self._delete_value)
+        return self._delete_value(value)
+
+    def _delete_value(self, value):
+        node = self._search(value)
+        if node is None or node.deleted:
+            return False
+        self.count -= 1
+        if self.lazy_delete:
+            node.deleted = True
+            self.tombstones += 1
+            self._resize(node, -1)
+            if self.tombstones > self.rebuild_fraction * (self.count + self.tombstones):
+                self._build([n for n in self._nodes() if not n.deleted])
+            return True
+        self._remove(node)
+        return True
+
+    def _remove(self, node):
+        '''
+        Unlink node from tree, with two children its successor takes its
+        place, so no other node changes its value.
+        '''
+        if node.left is not None and node.right is not None:
+            successor = self._first(node.right)
+            if successor.parent is node:
+                changed = successor
+            else:
+                # lift the right child of successor to where successor was
+                changed = successor.parent
+                self._replace_child(successor, successor.right)
+                successor.right = node.right
+                node.right.parent = successor
+            self._replace_child(node, successor)
+            successor.left = node.left
+            node.left.parent = successor
+        else:
+            changed = node.parent
+            self._replace_child(node, node.left if node.left is not None else node.right)
+        node.left = None
+        node.right = None
+        node.parent = None
+        self._tree_changed()
+        # fix heights and sizes from the lowest changed node up to root
+        if self.balanced:
+            self._rebalance(changed, True)
+        elif self.order_statistics:
+            while changed is not None:
+                self._update(changed)
+                changed = changed.parent
+
+    def search(self, value):
+        '''
+        Find node with the given value, return None if not in tree.
+        '''
+        if self.stats is not None:
+            return self._measure('search', value, self._search_value)
+        return self._search_value(value)
+
+    def _search_value(self, value):
+        node = self._search(value)
+        if node is not None and node.deleted:
+            return None
+        return node
+
+    def _measure(self, operation, value, method):
+        '''
+        Run method on value and record it in stats.
+        '''
+        from common.Instrumentation import timer, trace
+        visited, comparisons = trace(self.root, value)
+        rotations = self.rotations
+        start = timer()
+        result = method(value)
+        latency = timer() - start
+        self.stats.record(operation, latency, comparisons=comparisons,
+                          visited=visited, depth=visited,
+                          rotations=self.rotations - rotations,
+                          allocations=1 if operation == 'insert' else 0)
+        return result
 
-    def _height(self, root):
-        if root is None:
+    def _search(self, value):
+        node = self.root
+        while node is not None:
+            if value < node.value:
+                node = node.left
+            elif value > node.value:
+                node = node.right
+            else:
+                return node
+        return None
+
+    def __contains__(self, value):
+        return self.search(value) is not None
+
+    def inorder(self):
+        '''
+        Generate nodes in in-order, i.e. ascending order of values. Follow
+        parent links, so it takes O(1) extra memory.
+        '''
+        for node in self._nodes():
+            if not node.deleted:
+                yield node
+
+    def _nodes(self):
+        # all nodes in in-order, including deleted ones
+        node = self._first(self.root)
+        while node is not None:
+            yield node
+            node = self._next(node)
+
+    def __iter__(self):
+        for node in self.inorder():
+            yield node.value
+
+    def __reversed__(self):
+        node = self._last(self.root)
+        while node is not None:
+            if not node.deleted:
+                yield node.value
+            node = self._previous(node)
+
+    def iter_range(self, low, high):
+        '''
+        Generate values between low and high, both inclusive, in ascending
+        order. Getting the first k values costs O(h + k).
+        '''
+        node = self._ceiling(low)
+        while node is not None and not high < node.value:
+            if not node.deleted:
+                yield node.value
+            node = self._next(node)
+
+    def floor(self, value):
+        '''
+        Find the greatest value in tree not greater than value, None if all
+        are greater.
+        '''
+        node = self._floor(value)
+        return node.value if node is not None else None
+
+    def ceiling(self, value):
+        '''
+        Find the lowest value in tree not lower than value, None if all are
+        lower.
+        '''
+        node = self._ceiling(value)
+        return node.value if node is not None else None
+
+    def successor(self, value):
+        '''
+        Find the lowest value in tree greater than value, None if there is
+        no such value. value itself need not be in tree.
+        '''
+        node = self._ceiling(value)
+        if node is not None and not value < node.value:
+            node = self._next(node)
+            while node is not None and node.deleted:
+                node = self._next(node)
+        return node.value if node is not None else None
+
+    def _floor(self, value):
+        found = self._floor_any(value)
+        while found is not None and found.deleted:
+            found = self._previous(found)
+        return found
+
+    def _ceiling(self, value):
+        found = self._ceiling_any(value)
+        while found is not None and found.deleted:
+            found = self._next(found)
+        return found
+
+    def _floor_any(self, value):
+        found = None
+        node = self.root
+        while node is not None:
+            if value < node.value:
+                node = node.left
+            elif value > node.value:
+                found = node
+                node = node.right
+            else:
+                return node
+        return found
+
+    def _ceiling_any(self, value):
+        found = None
+        node = self.root
+        while node is not None:
+            if value < node.value:
+                found = node
+                node = node.left
+            elif value > node.value:
+                node = node.right
+            else:
+                return node
+        return found
+
+    def _first(self, node):
+        if node is not None:
+            while node.left is not None:
+                node = node.left
+        return node
+
+    def _last(self, node):
+        if node is not None:
+            while node.right is not None:
+                node = node.right
+        return node
+
+    def _next(self, node):
+        '''
+        Find the node next to node in in-order.
+        '''
+        if node.right is not None:
+            return self._first(node.right)
+        while node.parent is not None and node.parent.right is node:
+            node = node.parent
+        return node.parent
+
+    def _previous(self, node):
+        '''
+        Find the node previous to node in in-order.
+        '''
+        if node.left is not None:
+            return self._last(node.left)
+        while node.parent is not None and node.parent.left is node:
+            node = node.parent
+        return node.parent
+
+    def preorder(self):
+        '''
+        Generate nodes in pre-order.
+        '''
+        if self.root is None:
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not node.deleted:
+                yield node
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+
+    def _rebalance(self, node, to_root=False):
+        # walk up through parent links, fix heights and rotate where the
+        # AVL invariant is broken. After an insert, stop as soon as a sub
+        # tree keeps its old height, nothing above it can change. After a
+        # delete go on to root, sizes above still change.
+        while node is not None:
+            height = node.height
+            self._update(node)
+            balance = _height_of(node.left) - _height_of(node.right)
+            if balance > 1:
+                if _height_of(node.left.left) < _height_of(node.left.right):
+                    self._rotate_left(node.left)
+                node = self._rotate_right(node)
+            elif balance < -1:
+                if _height_of(node.right.right) < _height_of(node.right.left):
+                    self._rotate_right(node.right)
+                node = self._rotate_left(node)
+            if node.height == height and not to_root:
+                return
+            node = node.parent
+
+    def _update(self, node):
+        node.height = max(_height_of(node.left), _height_of(node.right)) + 1
+        node.size = _size_of(node.left) + _size_of(node.right) + (0 if node.deleted else 1)
+
+    def _replace_child(self, node, child):
+        # let child, maybe None, take the place of node under node's parent
+        parent = node.parent
+        if child is not None:
+            child.parent = parent
+        if parent is None:
+            self.root = child
+        elif parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
+
+    def _rotate_left(self, node):
+        self.rotations += 1
+        self._tree_changed()
+        pivot = node.right
+        self._replace_child(node, pivot)
+        node.right = pivot.left
+        if pivot.left is not None:
+            pivot.left.parent = node
+        pivot.left = node
+        node.parent = pivot
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rotate_right(self, node):
+        self.rotations += 1
+        self._tree_changed()
+        pivot = node.left
+        self._replace_child(node, pivot)
+        node.left = pivot.right
+        if pivot.right is not None:
+            pivot.right.parent = node
+        pivot.right = node
+        node.parent = pivot
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def rank(self, value):
+        '''
+        Count values in tree which are lower than the given value.
+        '''
+        return self._rank(value, False)
+
+    def select(self, index):
+        '''
+        Find node with the index-th smallest value, index starts from 0.
+        '''
+        self._check_order_statistics()
+        if index < 0 or index >= _size_of(self.root):
+            raise IndexError('tree index out of range: %r' % index)
+        node = self.root
+        while True:
+            left_size = _size_of(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size and not node.deleted:
+                return node
+            else:
+                index -= left_size + (0 if node.deleted else 1)
+                node = node.right
+
+    def count_range(self, low, high):
+        '''
+        Count values in tree between low and high, both inclusive.
+        '''
+        if high < low:
             return 0
-        return max(self._height(root.left), self._height(root.right)) + 1
+        return self._rank(high, True) - self._rank(low, False)
+
+    def _rank(self, value, inclusive):
+        self._check_order_statistics()
+        rank = 0
+        node = self.root
+        while node is not None:
+            if node.value < value or (inclusive and not value < node.value):
+                rank += _size_of(node.left) + (0 if node.deleted else 1)
+                node = node.right
+            else:
+                node = node.left
+        return rank
+
+    def _check_order_statistics(self):
+        if not self.order_statistics:
+            raise ValueError('tree does not track sub tree sizes, build it with order_statistics=True')
+
+    def save(self, path):
+        '''
+        Write tree to a binary snapshot file, see common.BSTSnapshot, only
+        integer values are supported.
+        '''
+        from common.BSTSnapshot import save
+        save(self, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        '''
+        Load tree from a snapshot file written by save. With mmap, return a
+        read only MappedBST served from the mapped file in O(1), else read
+        the whole file into a new tree in O(n).
+        '''
+        from common.BSTSnapshot import MappedBST, read
+        if mmap:
+            return MappedBST(path)
+        return read(path, cls)
+
+    def freeze(self):
+        '''
+        Return a FrozenBST holding values of this tree, an immutable and
+        compact structure for read only lookups, which remembers the shape
+        of this tree for lowest common ancestors.
+        '''
+        from common.FrozenBST import FrozenBST
+        return FrozenBST(self, self.root)
+
+    def height(self):
+        if self.balanced:
+            return _height_of(self.root)
+        # count levels breadth first
+        height = 0
+        level = [self.root] if self.root is not None else []
+        while level:
+            height += 1
+            children = []
+            for node in level:
+                if node.left is not None:
+                    children.append(node.left)
+                if node.right is not None:
+                    children.append(node.right)
+            level = children
+        return height
 
     def display(self):
-        height = self.height()
-        if height == 0:
+        if self.root is None:
             return
         print 'Tree View: '
-        if height == 1:
-            print self.root.value
-            return
-        rows = height * 2 - 1
-        columns = self.count * 2 - 1
-        output = []
-        for _ in range(rows):
-            row = [' '] * columns
-            output.append(row)
-        self._fill_node(self.root, output, 0, 2)
+        print self.render()
+
+    def render(self, stream=None):
         '''
-        i = 0
-        j = 0
-        for row in output:
-            j = 0
-            for e in row:
-                if len(e.strip()) == 1:
-                    output[i][j] = ' ' + e
-                j += 1
-            i += 1
-        '''
-        print '\n'.join([''.join(row) for row in output])
-
-    def _fill_node(self, node, output, row, column):
-        if node is None:
-            return
-        children_row = row + 2
-        # really fill
-        output[row][column] = '%s' % node.value
-        node.extra['row'] = row
-        node.extra['column'] = column
-        if node.left is not None:
-            left_column = column - 2
-            while left_column < 0:
-                print 'left column: %s, need move, value: %s' % (left_column, node.left.value)
-                # move nodes
-                self._move(node.left, output)
-                left_column += 1
-            while output[row+1][left_column-1] != ' ':
-                # already occupied, move nodes
-                print 'symbol occupied, need move, value: %s' % node.left.value
-                self._move(node.left, output)
-                left_column += 1
-            while output[children_row][left_column-1] != ' ':
-                # already occupied, move nodes
-                print 'value occupied, need move, value: %s' % node.left.value
-                self._move(node.left, output)
-                left_column += 1
-            while output[children_row][left_column-2] != ' ':
-                # already occupied, move nodes
-                print 'value occupied, need move, value: %s' % node.left.value
-                self._move(node.left, output)
-                left_column += 1
-            while output[children_row][left_column+1] != ' ':
-                # already occupied, move nodes
-                print 'value occupied, need move, value: %s' % node.left.value
-                self._move(node.left, output)
-                left_column += 1
-            while output[children_row][left_column+2] != ' ':
-                # already occupied, move nodes
-                print 'value occupied, need move, value: %s' % node.left.value
-                self._move(node.left, output)
-                left_column += 1
-            while output[children_row][left_column] != ' ':
-                # already occupied, move nodes
-                print 'value occupied, need move, value: %s' % node.left.value
-                self._move(node.left, output)
-                left_column += 1
-            output[row+1][left_column+1] = '/'
-            output[children_row][left_column] = '%s' % node.left.value
-            node.left.extra['row'] = children_row
-            node.left.extra['column'] = left_column
-            self._fill_node(node.left, output, children_row, left_column)
-        if node.right is not None:
-            column = node.extra['column']
-            right_column = column + 2
-            output[row+1][column+1] = '\\'
-            output[children_row][right_column] = '%s' % node.right.value
-            node.right.extra['row'] = children_row
-            node.right.extra['column'] = right_column
-            self._fill_node(node.right, output, children_row, right_column)
-
-    def _move(self, node, output):
-        if node == self.root:
-            #row = self.root.extra['row']
-            #col = self.root.extra['column']
-            #output[row][col], output[row][col+1] = output[row][col+1], output[row][col]
-            #self.root.extra['column'] = col + 1
-            return
-        parent = node.parent
-        print 'move %s' % parent.value
-        if parent.value < node.value:
-            # move node to right
-            self._move_right(parent, output, 'right')
-        elif parent.value > node.value:
-            # move node to right
-            self._move_right(parent, output, 'left')
-            self._move(parent, output)
-
-    def _move_right(self, node, output, direction):
-        print 'move right: %s, direction: %s' % (node.value, direction)
-        row = node.extra['row']
-        col = node.extra['column']
-        # move value
-        output[row][col], output[row][col+1] = output[row][col+1], output[row][col]
-        node.extra['column'] = col + 1
-        # move direction symbol
-        if direction == 'left':
-            d_col = col - 1
-        elif direction == 'right':
-            d_col = col + 1
-        output[row+1][d_col], output[row+1][d_col+1] = output[row+1][d_col+1], output[row+1][d_col]
+        Render tree as text, two lines for each level of the tree, one for
+        values and one for links to the next level. Return the text, or write
+        it line by line to stream if given.
+
+        Each node gets its own columns by in-order position, values never
+        overlap so nothing needs to be moved, it costs O(n) plus the size of
+        the output.
+        '''
+        if stream is None:
+            return '\n'.join(self._render_lines())
+        for line in self._render_lines():
+            stream.write(line)
+            stream.write('\n')
+
+    def _render_lines(self):
+        # start column of every node, values separated by one space
+        columns = {}
+        labels = {}
+        column = 0
+        for node in self._nodes():
+            label = '%s' % node.value
+            columns[node] = column
+            labels[node] = label
+            column += len(label) + 1
+
+        level = [self.root] if self.root is not None else []
+        while level:
+            values = []
+            links = []
+            values_end = 0
+            links_end = 0
+            children = []
+            for node in level:
+                start = columns[node]
+                end = start + len(labels[node])
+                left = node.left
+                right = node.right
+                if left is not None:
+                    # '/' right after the left child, '_' up to the node
+                    link = columns[left] + len(labels[left])
+                    links.append(' ' * (link - links_end))
+                    links.append('/')
+                    links_end = link + 1
+                    values.append(' ' * (link + 1 - values_end))
+                    values.append('_' * (start - link - 1))
+                    values_end = start
+                    children.append(left)
+                values.append(' ' * (start - values_end))
+                values.append(labels[node])
+                values_end = end
+                if right is not None:
+                    # '_' from the node, '\\' right before the right child
+                    link = columns[right] - 1
+                    values.append('_' * (link - end))
+                    values_end = link
+                    links.append(' ' * (link - links_end))
+                    links.append('\\')
+                    links_end = link + 1
+                    children.append(right)
+            yield ''.join(values)
+            if children:
+                yield ''.join(links)
+            level = children
 
 if __name__ == '__main__':
     #bst = BST([7, 2, 1, 5, 4, 3, 6, 12, 9, 13, 8, 11, 10, 15, 14, 16])
@@ -0,0 +1,245 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Binary snapshot of common.BST, so a tree is loaded from file instead of
+inserted again value by value.
+
+File layout, all little endian:
+
+    header  magic 'BSTS', version, options, number of nodes, count and
+            rebuild fraction of the tree, see HEADER
+    keys    int64 value of each node
+    left    int64 index of left child of each node, -1 for none
+    right   int64 index of right child of each node, -1 for none
+    parent  int64 index of parent of each node, -1 for none
+    flags   one byte for each node, FLAG_DELETED for lazily deleted nodes
+
+Nodes are numbered in pre-order, so the root is node 0 and every node comes
+before its children. Only integer values fit the layout.
+
+A snapshot is either read into a BST, or mapped into memory as a MappedBST
+which searches the arrays in the mapping directly, and only creates node
+objects for the nodes a caller actually asks for.
+'''
+
+import mmap
+import struct
+
+HEADER = struct.Struct('<4sHHqqd')
+MAGIC = b'BSTS'
+VERSION = 1
+
+OPTION_BALANCED = 1
+OPTION_ORDER_STATISTICS = 2
+OPTION_LAZY_DELETE = 4
+
+FLAG_DELETED = 1
+
+INT64 = struct.Struct('<q')
+# values packed at once when writing arrays
+CHUNK = 1 << 16
+
+def save(tree, path):
+    nodes = list(_preorder(tree))
+    values = [node.value for node in nodes]
+    # struct only warns and truncates floats to int, check before writing
+    for value in values:
+        if (not isinstance(value, (int, long)) or isinstance(value, bool)
+                or not -(1 << 63) <= value < (1 << 63)):
+            raise TypeError('only 64 bit integer values can be saved, got %r' % (value,))
+    index = dict((id(node), i) for i, node in enumerate(nodes))
+
+    def position(node):
+        return index[id(node)] if node is not None else -1
+
+    options = ((OPTION_BALANCED if tree.balanced else 0)
+               | (OPTION_ORDER_STATISTICS if tree.order_statistics else 0)
+               | (OPTION_LAZY_DELETE if tree.lazy_delete else 0))
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, options, len(nodes), tree.count,
+                            tree.rebuild_fraction))
+        _write_array(f, values)
+        _write_array(f, [position(node.left) for node in nodes])
+        _write_array(f, [position(node.right) for node in nodes])
+        _write_array(f, [position(node.parent) for node in nodes])
+        f.write(bytearray(FLAG_DELETED if node.deleted else 0 for node in nodes))
+
+def _preorder(tree):
+    # all nodes in pre-order, including lazily deleted ones
+    stack = [tree.root] if tree.root is not None else []
+    while stack:
+        node = stack.pop()
+        yield node
+        if node.right is not None:
+            stack.append(node.right)
+        if node.left is not None:
+            stack.append(node.left)
+
+def _write_array(f, values):
+    for start in range(0, len(values), CHUNK):
+        chunk = values[start:start + CHUNK]
+        f.write(struct.pack('<%dq' % len(chunk), *chunk))
+
+def _read_header(data, path):
+    magic, version, options, size, count, rebuild_fraction = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError('not a BST snapshot: %s' % path)
+    if version != VERSION:
+        raise ValueError('unsupported BST snapshot version %d: %s' % (version, path))
+    return options, size, count, rebuild_fraction
+
+def read(path, cls):
+    '''
+    Read snapshot at path into a new tree of class cls, in O(n).
+    '''
+    from common.BST import Node
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    options, size, count, rebuild_fraction = _read_header(data, path)
+    tree = cls([], balanced=bool(options & OPTION_BALANCED),
+               order_statistics=bool(options & OPTION_ORDER_STATISTICS),
+               lazy_delete=bool(options & OPTION_LAZY_DELETE),
+               rebuild_fraction=rebuild_fraction)
+    if size == 0:
+        return tree
+    array_format = '<%dq' % size
+    offset = HEADER.size
+    keys = struct.unpack_from(array_format, data, offset)
+    lefts = struct.unpack_from(array_format, data, offset + size * 8)
+    rights = struct.unpack_from(array_format, data, offset + size * 16)
+    flags = bytearray(data[offset + size * 32:offset + size * 33])
+    nodes = [Node(key) for key in keys]
+    # children come after parents in pre-order, so walk backwards to see
+    # children first and compute heights and sizes bottom up
+    for i in range(size - 1, -1, -1):
+        node = nodes[i]
+        node.deleted = bool(flags[i] & FLAG_DELETED)
+        if lefts[i] >= 0:
+            node.left = nodes[lefts[i]]
+            node.left.parent = node
+        if rights[i] >= 0:
+            node.right = nodes[rights[i]]
+            node.right.parent = node
+        tree._update(node)
+    tree.root = nodes[0]
+    tree.count = count
+    tree.tombstones = size - count
+    return tree
+
+class MappedNode(object):
+    '''
+    Node of a MappedBST, children and parent are looked up in the mapping
+    when asked for.
+    '''
+
+    __slots__ = ('tree', 'index', 'value')
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+        self.value = tree._key(index)
+
+    @property
+    def left(self):
+        return self.tree._node(self.tree._link(1, self.index))
+
+    @property
+    def right(self):
+        return self.tree._node(self.tree._link(2, self.index))
+
+    @property
+    def parent(self):
+        return self.tree._node(self.tree._link(3, self.index))
+
+    @property
+    def deleted(self):
+        return self.tree._deleted(self.index)
+
+class MappedBST(object):
+    '''
+    Read only tree served straight from a memory mapped snapshot, opening it
+    costs O(1), pages are read in when lookups touch them.
+    '''
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mapping = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        options, self.size, self.count, _ = _read_header(self._mapping, path)
+        self.balanced = bool(options & OPTION_BALANCED)
+        # nodes created so far, so a node is always the same object
+        self._nodes = {}
+
+    def close(self):
+        self._mapping.close()
+        self._file.close()
+
+    def _key(self, index):
+        return INT64.unpack_from(self._mapping, HEADER.size + index * 8)[0]
+
+    def _link(self, array, index):
+        # array 1, 2, 3 for left, right, parent
+        return INT64.unpack_from(self._mapping, HEADER.size + (array * self.size + index) * 8)[0]
+
+    def _deleted(self, index):
+        return bool(ord(self._mapping[HEADER.size + self.size * 32 + index]) & FLAG_DELETED)
+
+    def _node(self, index):
+        if index < 0:
+            return None
+        node = self._nodes.get(index)
+        if node is None:
+            node = self._nodes[index] = MappedNode(self, index)
+        return node
+
+    @property
+    def root(self):
+        return self._node(0 if self.size else -1)
+
+    def _search(self, value):
+        index = 0 if self.size else -1
+        while index >= 0:
+            key = self._key(index)
+            if value < key:
+                index = self._link(1, index)
+            elif value > key:
+                index = self._link(2, index)
+            else:
+                return index
+        return -1
+
+    def search(self, value):
+        '''
+        Find node with the given value, return None if not in tree.
+        '''
+        index = self._search(value)
+        if index < 0 or self._deleted(index):
+            return None
+        return self._node(index)
+
+    def __contains__(self, value):
+        index = self._search(value)
+        return index >= 0 and not self._deleted(index)
+
+    def __iter__(self):
+        stack = []
+        index = 0 if self.size else -1
+        while stack or index >= 0:
+            while index >= 0:
+                stack.append(index)
+                index = self._link(1, index)
+            index = stack.pop()
+            if not self._deleted(index):
+                yield self._key(index)
+            index = self._link(2, index)
+
+    def height(self):
+        height = 0
+        level = [0] if self.size else []
+        while level:
+            height += 1
+            level = [child for index in level
+                     for child in (self._link(1, index), self._link(2, index)) if child >= 0]
+        return height
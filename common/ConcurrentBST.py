@@ -0,0 +1,168 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Binary search tree shared by threads, readers never take a lock.
+
+Nodes are immutable. Insert copies the nodes on the path from root to the
+new leaf (path copying) and keeps the copied path balanced with AVL
+rotations, so it creates O(log n) new nodes and the old tree stays intact.
+Writers are serialized by a lock and publish the new root with a single
+attribute assignment, which is atomic. A reader grabs the current version
+once and works on it, it always sees a complete tree, never a half done
+insert.
+
+Nodes have no parent links, a parent link would make every node of the tree
+part of the path to copy.
+'''
+
+import threading
+
+class PersistentNode(object):
+    '''
+    Immutable tree node
+    '''
+
+    __slots__ = ('value', 'left', 'right', 'height')
+
+    # never lazily deleted, see common.BST.Node
+    deleted = False
+
+    def __init__(self, value, left=None, right=None):
+        self.value = value
+        self.left = left
+        self.right = right
+        self.height = max(_height_of(left), _height_of(right)) + 1
+
+def _height_of(node):
+    if node is None:
+        return 0
+    return node.height
+
+def _balance(value, left, right):
+    '''
+    Make a node of value with the given children, rotate if the children
+    heights differ by more than 1.
+    '''
+    if _height_of(left) > _height_of(right) + 1:
+        if _height_of(left.left) < _height_of(left.right):
+            pivot = left.right
+            return PersistentNode(pivot.value,
+                                  PersistentNode(left.value, left.left, pivot.left),
+                                  PersistentNode(value, pivot.right, right))
+        return PersistentNode(left.value, left.left, PersistentNode(value, left.right, right))
+    if _height_of(right) > _height_of(left) + 1:
+        if _height_of(right.right) < _height_of(right.left):
+            pivot = right.left
+            return PersistentNode(pivot.value,
+                                  PersistentNode(value, left, pivot.left),
+                                  PersistentNode(right.value, pivot.right, right.right))
+        return PersistentNode(right.value, PersistentNode(value, left, right.left), right.right)
+    return PersistentNode(value, left, right)
+
+def _insert(node, value):
+    '''
+    Return a new version of the sub tree with value inserted, or node itself
+    if value is already in it. Recursion depth is the AVL height, O(log n).
+    '''
+    if node is None:
+        return PersistentNode(value)
+    if value < node.value:
+        left = _insert(node.left, value)
+        if left is node.left:
+            return node
+        return _balance(node.value, left, node.right)
+    if value > node.value:
+        right = _insert(node.right, value)
+        if right is node.right:
+            return node
+        return _balance(node.value, node.left, right)
+    return node
+
+class Snapshot(object):
+    '''
+    One version of a ConcurrentBST, never changes.
+    '''
+
+    def __init__(self, root, count):
+        self.root = root
+        self.count = count
+
+    def search(self, value):
+        node = self.root
+        while node is not None:
+            if value < node.value:
+                node = node.left
+            elif value > node.value:
+                node = node.right
+            else:
+                return node
+        return None
+
+    def __contains__(self, value):
+        return self.search(value) is not None
+
+    def __iter__(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.value
+            node = node.right
+
+    def height(self):
+        return _height_of(self.root)
+
+class ConcurrentBST(object):
+    '''
+    Thread safe binary search tree, reads are lock free, inserts are
+    serialized and copy O(log n) nodes.
+    '''
+
+    def __init__(self, values=()):
+        self._lock = threading.Lock()
+        self._snapshot = Snapshot(None, 0)
+        for value in values:
+            self.insert(value)
+
+    def insert(self, value):
+        '''
+        Insert value, return False if it is already in tree.
+        '''
+        with self._lock:
+            current = self._snapshot
+            root = _insert(current.root, value)
+            if root is current.root:
+                return False
+            self._snapshot = Snapshot(root, current.count + 1)
+            return True
+
+    def snapshot(self):
+        '''
+        Get the current version, use it for a consistent series of reads.
+        '''
+        return self._snapshot
+
+    @property
+    def root(self):
+        return self._snapshot.root
+
+    @property
+    def count(self):
+        return self._snapshot.count
+
+    def search(self, value):
+        return self._snapshot.search(value)
+
+    def __contains__(self, value):
+        return self._snapshot.search(value) is not None
+
+    def __iter__(self):
+        return iter(self._snapshot)
+
+    def height(self):
+        return self._snapshot.height()
@@ -0,0 +1,203 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Immutable binary search tree stored in one contiguous array.
+
+Keys are laid out in Eytzinger order, the order of a breadth first walk of
+a complete binary search tree: root at index 1, children of node k at 2k
+and 2k + 1. There are no node objects and no pointers to follow, moving
+down a level is an index computation, and the top levels, which every
+search touches, are packed at the front of the array.
+
+Because all searches descend the same levels in the same way, a batch of
+keys can be searched at once level by level with numpy.
+
+The complete tree has its own shape. When frozen from a common.BST, the
+parent of every node in that tree is kept in another array next to the keys,
+so lowest common ancestors are the ones of the tree that was frozen.
+'''
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class FrozenBST(object):
+    '''
+    Static search structure over sorted distinct values.
+    '''
+
+    def __init__(self, values, root=None):
+        '''
+        Lay out values, given in ascending order. If root is given, it is
+        the root of the tree values come from, whose shape lowest common
+        ancestors are taken from.
+        '''
+        values = list(values)
+        self.count = len(values)
+        keys = [values[0] if values else 0] * (self.count + 1)
+        # walk the implicit tree in-order, which visits positions in the
+        # order of sorted values
+        position = 0
+        # positions of values in ascending order
+        order = []
+        stack = []
+        k = 1
+        while stack or k <= self.count:
+            while k <= self.count:
+                stack.append(k)
+                k *= 2
+            k = stack.pop()
+            keys[k] = values[position]
+            order.append(k)
+            position += 1
+            k = k * 2 + 1
+        try:
+            # machine integers take 8 bytes each, other values stay in a list
+            self.keys = array('l', keys)
+        except (TypeError, OverflowError):
+            self.keys = keys
+        self._numpy_keys = None
+        # positions of parents and depths in the source tree, None if there
+        # is none and the complete tree is the only shape
+        self.parents = None
+        self.depths = None
+        # values of lazily deleted source nodes, which may still be common
+        # ancestors, at positions after count
+        self.ghosts = []
+        if root is not None:
+            self._link(root, order)
+
+    def _link(self, root, order):
+        # live nodes take positions of their values in in-order
+        positions = {}
+        rank = 0
+        stack = []
+        node = root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            if node.deleted:
+                self.ghosts.append(node.value)
+                positions[node] = self.count + len(self.ghosts)
+            else:
+                positions[node] = order[rank]
+                rank += 1
+            node = node.right
+        if rank != self.count:
+            raise ValueError('values do not match the tree at root')
+        size = self.count + len(self.ghosts) + 1
+        parents = [0] * size
+        depths = [0] * size
+        stack = [(root, 0, 0)]
+        while stack:
+            node, parent, depth = stack.pop()
+            k = positions[node]
+            parents[k] = parent
+            depths[k] = depth
+            for child in (node.left, node.right):
+                if child is not None:
+                    stack.append((child, k, depth + 1))
+        self.parents = array('l', parents)
+        self.depths = array('l', depths)
+
+    def height(self):
+        return self.count.bit_length()
+
+    def _position(self, value):
+        keys = self.keys
+        k = 1
+        while k <= self.count:
+            key = keys[k]
+            if value < key:
+                k = k * 2
+            elif value > key:
+                k = k * 2 + 1
+            else:
+                return k
+        return 0
+
+    def contains(self, value):
+        return self._position(value) != 0
+
+    __contains__ = contains
+
+    def floor(self, value):
+        '''
+        Find the greatest value not greater than value, None if all are
+        greater.
+        '''
+        keys = self.keys
+        found = 0
+        k = 1
+        while k <= self.count:
+            if value < keys[k]:
+                k = k * 2
+            else:
+                found = k
+                k = k * 2 + 1
+        return keys[found] if found else None
+
+    def lowest_common_ancestor(self, first_value, second_value):
+        '''
+        Find the value of the lowest common ancestor of two values in the
+        tree this was frozen from, None if any of them is not in tree.
+        Without a source tree, find it in the complete tree.
+        '''
+        first = self._position(first_value)
+        second = self._position(second_value)
+        if not first or not second:
+            return None
+        if self.parents is None:
+            # parent of k is k / 2, and a greater index is never shallower
+            while first != second:
+                if first > second:
+                    first //= 2
+                else:
+                    second //= 2
+            return self.keys[first]
+        parents = self.parents
+        depths = self.depths
+        while depths[first] > depths[second]:
+            first = parents[first]
+        while depths[second] > depths[first]:
+            second = parents[second]
+        while first != second:
+            first = parents[first]
+            second = parents[second]
+        if first > self.count:
+            return self.ghosts[first - self.count - 1]
+        return self.keys[first]
+
+    def lookup_many(self, values):
+        '''
+        Look up a batch of values, return a numpy bool array telling which
+        ones are in tree. All values descend one level per step together.
+        '''
+        if numpy is None:
+            raise ImportError('lookup_many requires numpy')
+        if self._numpy_keys is None:
+            if isinstance(self.keys, array):
+                self._numpy_keys = numpy.frombuffer(self.keys, dtype=numpy.dtype(self.keys.typecode))
+            else:
+                self._numpy_keys = numpy.array(self.keys)
+        keys = self._numpy_keys
+        values = numpy.asarray(values)
+        if self.count == 0:
+            return numpy.zeros(len(values), dtype=bool)
+        k = numpy.ones(len(values), dtype=numpy.int64)
+        # position of the lowest key not lower than value found so far
+        found = numpy.zeros(len(values), dtype=numpy.int64)
+        for _ in range(self.height()):
+            inside = k <= self.count
+            key = keys[numpy.where(inside, k, 1)]
+            lower = key < values
+            found = numpy.where(inside & ~lower, k, found)
+            k = numpy.where(inside, k * 2 + lower, k)
+        return (found != 0) & (keys[found] == values)
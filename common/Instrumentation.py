@@ -0,0 +1,129 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Opt-in instrumentation of tree operations.
+
+Assign a Stats to the stats attribute of a tree to turn it on, e.g.
+tree.stats = Stats(), and None to turn it off. When off, an operation pays a
+single attribute check. When on, each operation is timed, and its walk down
+the tree is replayed to count comparisons and visited nodes, so the walk
+itself carries no counters.
+'''
+
+from timeit import default_timer
+
+class OperationStats(object):
+    '''
+    Totals of one kind of operation, with a latency histogram whose buckets
+    are powers of two microseconds.
+    '''
+
+    def __init__(self):
+        self.calls = 0
+        self.latency = 0.0
+        self.comparisons = 0
+        self.visited = 0
+        self.max_depth = 0
+        self.rotations = 0
+        self.allocations = 0
+        # upper bound in microseconds -> calls
+        self.histogram = {}
+
+    def add(self, record):
+        self.calls += 1
+        self.latency += record['latency']
+        self.comparisons += record['comparisons']
+        self.visited += record['visited']
+        self.max_depth = max(self.max_depth, record['depth'])
+        self.rotations += record['rotations']
+        self.allocations += record['allocations']
+        bucket = 1 << int(record['latency'] * 1e6).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def percentile(self, percent):
+        '''
+        Estimate latency percentile in seconds, as the upper bound of the
+        histogram bucket it falls in.
+        '''
+        rank = self.calls * percent / 100.0
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= rank:
+                return bucket / 1e6
+        return 0.0
+
+    def snapshot(self):
+        return {
+            'calls': self.calls,
+            'latency': self.latency,
+            'comparisons': self.comparisons,
+            'visited': self.visited,
+            'max_depth': self.max_depth,
+            'rotations': self.rotations,
+            'allocations': self.allocations,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'histogram': dict(self.histogram),
+        }
+
+class Stats(object):
+    '''
+    Collect records of operations. callback, if given, is called with the
+    operation name and the record of every operation.
+    '''
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.operations = {}
+
+    def record(self, operation, latency, comparisons=0, visited=0, depth=0,
+               rotations=0, allocations=0):
+        record = {
+            'latency': latency,
+            'comparisons': comparisons,
+            'visited': visited,
+            'depth': depth,
+            'rotations': rotations,
+            'allocations': allocations,
+        }
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = OperationStats()
+        stats.add(record)
+        if self.callback is not None:
+            self.callback(operation, record)
+
+    def snapshot(self):
+        '''
+        Get totals of all operations so far as a dict by operation name.
+        '''
+        return dict((name, stats.snapshot()) for name, stats in self.operations.items())
+
+    def reset(self):
+        self.operations = {}
+
+def trace(node, value):
+    '''
+    Replay a search for value from node, return the number of visited nodes
+    and comparisons, with a less than test first and a greater than test
+    next on each node, like the searches of common.BST.
+    '''
+    visited = 0
+    comparisons = 0
+    while node is not None:
+        visited += 1
+        if value < node.value:
+            comparisons += 1
+            node = node.left
+        else:
+            comparisons += 2
+            if value > node.value:
+                node = node.right
+            else:
+                break
+    return visited, comparisons
+
+timer = default_timer
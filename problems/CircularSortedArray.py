@@ -2,32 +2,138 @@
 Created on: May 06, 2014
 
 @author: qwang
+
+Search in a circular sorted array, i.e. a sorted array rotated at some
+unknown point, like [4, 5, 6, 1, 2, 3].
+
+The smallest element is the rotation point, elements after it and elements
+before it are two sorted halves. The rotation point can be found by binary
+search: compare the middle element with the last one, if it is greater, the
+rotation point is on the right of the middle, if it is lower, the rotation
+point is the middle or on its left. When they are equal (only possible with
+duplicated values) it is not known which side to take, so drop the last
+element and go on, in the worst case, like [1, 1, 1, 0, 1], this is O(n).
+
+Once the rotation point is known, compare the element with the first one of
+the array to choose the half it can be in, then binary search that half.
+The rotation point does not change between searches, so find it once and
+pass it to each search.
+
+To look up lots of elements at once, find the rotation point once and search
+both sorted halves for all of them, with numpy.searchsorted if numpy is
+available, otherwise by walking the sorted elements along each half.
 '''
 
-def binary_search(array, elem):
-    pass
+from bisect import bisect_left
 
-def find(array, elem):
-    mid_index = len(array) / 2
-    start = array[0]
-    end = array[-1]
-    mid = array[mid]
-    if start <= mid and mid <= end:
-        # sorted, find by binary search
-        return binary_search(array, elem)
-    elif start <= mid and mid >= end:
-        # first half sorted, recursilly get sorted half
-        if elem >= start and elem <= mid:
-            return binary_serach(array[0:mid_index+1], elem)
-        else:
-            return find(array[mid_index:-1])
-    elif end >= mid and mid >= start:
-        # second half sorted, recursilly get sorted half
-        if elem >= mid and elem <= end:
-            return binary_search(array[mid_index:-1], elem)
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def binary_search(array, elem, low=0, high=None):
+    '''
+    Find index of elem in sorted array[low:high], -1 if not found.
+    '''
+    if high is None:
+        high = len(array)
+    index = bisect_left(array, elem, low, high)
+    if index < high and array[index] == elem:
+        return index
+    return -1
+
+def find_rotation_point(array):
+    '''
+    Find index of the smallest element, array[index:] + array[:index] is
+    sorted. Return 0 if array is not rotated or empty.
+    '''
+    low = 0
+    high = len(array) - 1
+    while low < high:
+        if array[low] < array[high]:
+            # sorted range, no rotation inside
+            return low
+        middle = (low + high) // 2
+        if array[middle] > array[high]:
+            low = middle + 1
+        elif array[middle] < array[high]:
+            high = middle
         else:
-            return find(array[0:mid_index+1], elem)
+            # can't tell which side, drop the last element unless it's
+            # the rotation point
+            if array[high - 1] > array[high]:
+                return high
+            high -= 1
+    return low
+
+def find(array, elem, pivot=None):
+    '''
+    Find index of elem in circular sorted array, -1 if not found. Pass
+    pivot, the result of find_rotation_point, to reuse it between searches.
+    '''
+    if not array:
+        return -1
+    if pivot is None:
+        pivot = find_rotation_point(array)
+    if pivot == 0:
+        return binary_search(array, elem)
+    if elem >= array[0]:
+        return binary_search(array, elem, 0, pivot)
+    return binary_search(array, elem, pivot, len(array))
+
+def find_many(array, elems, backend=None):
+    '''
+    Find indexes of elems in circular sorted array, -1 for each elem not
+    found. backend is 'numpy' or 'python', by default numpy is used if it
+    is available. Return a numpy array with numpy backend, else a list.
+    '''
+    if backend is None:
+        backend = 'numpy' if numpy is not None else 'python'
+    if backend == 'numpy':
+        return _find_many_numpy(array, elems)
+    if backend != 'python':
+        raise ValueError('unknown backend: %r' % backend)
+    elems = list(elems)
+    result = [-1] * len(elems)
+    if not array:
+        return result
+    pivot = find_rotation_point(array)
+    first = array[0]
+    # [low, high) left to search of the right half and the left half, elems
+    # are searched in ascending order, so each search starts where the
+    # previous one in the same half stopped
+    bounds = [[pivot, len(array)], [0, pivot]]
+    for i in sorted(range(len(elems)), key=elems.__getitem__):
+        elem = elems[i]
+        half = bounds[pivot > 0 and elem >= first]
+        index = bisect_left(array, elem, half[0], half[1])
+        half[0] = index
+        if index < half[1] and array[index] == elem:
+            result[i] = index
+    return result
+
+def _find_many_numpy(array, elems):
+    if numpy is None:
+        raise ImportError('numpy backend requires numpy')
+    array = numpy.asarray(array)
+    elems = numpy.asarray(elems)
+    result = numpy.full(len(elems), -1, dtype=numpy.int64)
+    if len(array) == 0:
+        return result
+    pivot = find_rotation_point(array)
+    left = elems >= array[0] if pivot > 0 else numpy.zeros(len(elems), dtype=bool)
+    for mask, low, high in ((left, 0, pivot), (~left, pivot, len(array))):
+        half = array[low:high]
+        if len(half) == 0:
+            continue
+        keys = elems[mask]
+        index = numpy.searchsorted(half, keys)
+        found = half[numpy.minimum(index, len(half) - 1)] == keys
+        result[numpy.flatnonzero(mask)[found]] = index[found] + low
+    return result
 
 if __name__ == '__main__':
     array = [1, 2, 3, 4, 5, -3, -2, -1]
     elem = -3
+    print find(array, elem)
+    print find_many(array, [elem, 4, 0])
@@ -86,8 +86,28 @@ appear in the tree.  If they do not, then we need to modify the above
 algorithm so that upon finding a node that would be the LCA of the two nodes
 if they actually appear in the tree, we do a secondary test to make sure
 that the nodes actually appear in the BST at all.
+
+When lots of queries are asked against a tree which rarely changes, it pays
+off to preprocess the tree once. LowestCommonAncestor.build returns an index
+based on the Euler tour of the tree and a sparse table for range minimum
+queries, which answers each query in O(1) after O(n log n) preprocessing.
+
+That index must be built again whenever the tree changes. For a tree which
+keeps growing by inserts, LowestCommonAncestor.track keeps a binary lifting
+index instead: every node remembers its ancestors 1, 2, 4, ... levels up,
+which takes O(log n) to work out for a new leaf from the tables of its
+ancestors. A query lifts the deeper node to the depth of the other, then
+lifts both as long as they differ, in O(log h) steps however deep the tree.
+Rotations move inner nodes, so while the index is out of date queries walk
+the tree as usual, and the index is only built again once those walks have
+visited as many nodes as the tree has.
 '''
 
+import weakref
+
+# tree -> DynamicLCAIndex kept up to date by LowestCommonAncestor.track
+_tracked = weakref.WeakKeyDictionary()
+
 class LowestCommonAncestor(object):
     '''
     Implementation of finding lowest common ancestor of binary search tree.
@@ -96,26 +116,423 @@ class LowestCommonAncestor(object):
     @classmethod
     def find(cls, tree, first_value, second_value):
         '''
-        Find lowest common ancestor of the given binary search tree
+        Find lowest common ancestor of the given binary search tree, return
+        None if any of the values is not in tree.
         '''
-        # TODO valid values, must not equal and in tree
-        if first_value < second_value:
-            return cls._find(tree.root, first_value, second_value)
-        else:
-            return cls._find(tree.root, second_value, first_value)
+        index = _tracked.get(tree) if _tracked else None
+        stats = getattr(tree, 'stats', None)
+        if stats is not None:
+            return cls._measure(stats, tree, first_value, second_value, index)
+        if index is not None:
+            return index.find(first_value, second_value)
+        return cls._find_in_tree(tree, first_value, second_value)
+
+    @classmethod
+    def _find_in_tree(cls, tree, first_value, second_value):
+        if second_value < first_value:
+            first_value, second_value = second_value, first_value
+        node = cls._find(tree.root, first_value, second_value)
+        if node is None:
+            return None
+        # make sure both values actually appear below the found node
+        if cls._search(node, first_value) is None or cls._search(node, second_value) is None:
+            return None
+        return node
+
+    @classmethod
+    def _measure(cls, stats, tree, first_value, second_value, index=None):
+        '''
+        Run find and record it in stats, see common.Instrumentation.
+        '''
+        from common.Instrumentation import timer, trace
+        if index is not None:
+            start = timer()
+            node, steps = index._lift(first_value, second_value)
+            latency = timer() - start
+            stats.record('find', latency, comparisons=steps, visited=steps)
+            return node
+        start = timer()
+        node = cls._find_in_tree(tree, first_value, second_value)
+        latency = timer() - start
+        # replay the walk, down to the split node, then down to each value
+        low, high = min(first_value, second_value), max(first_value, second_value)
+        split = tree.root
+        visited = 0
+        comparisons = 0
+        while split is not None:
+            visited += 1
+            if split.value > high:
+                comparisons += 1
+                split = split.left
+            elif split.value < low:
+                comparisons += 2
+                split = split.right
+            else:
+                comparisons += 2
+                break
+        depth = visited
+        if split is not None:
+            deepest = 0
+            for value in (low, high):
+                value_visited, value_comparisons = trace(split, value)
+                visited += value_visited
+                comparisons += value_comparisons
+                deepest = max(deepest, value_visited)
+            # both searches start from the split node
+            depth += deepest - 1
+        stats.record('find', latency, comparisons=comparisons, visited=visited, depth=depth)
+        return node
 
     @classmethod
     def _find(cls, node, first_value, second_value):
         '''
         Find lowest common ancestor of the given sub tree.
-        NOTICE first value must lower than second value
+        NOTICE first value must not be greater than second value
         '''
-        if node.value > second_value:
-            return cls._find(node.left, first_value, second_value)
-        elif node.value < first_value:
-            return cls._find(node.right, first_value, second_value)
-        else:
-            return node
+        while node is not None:
+            if node.value > second_value:
+                node = node.left
+            elif node.value < first_value:
+                node = node.right
+            else:
+                return node
+        return None
+
+    @classmethod
+    def _search(cls, node, value):
+        while node is not None:
+            if value < node.value:
+                node = node.left
+            elif value > node.value:
+                node = node.right
+            elif node.deleted:
+                # lazily deleted from tree
+                return None
+            else:
+                return node
+        return None
+
+    @classmethod
+    def find_many(cls, tree, pairs):
+        '''
+        Find lowest common ancestors of a batch of (first_value,
+        second_value) pairs with Tarjan's offline algorithm, in one walk of
+        the tree and near linear total time. Generate the nodes in the order
+        of pairs, None for pairs with a value not in tree.
+
+        Walk the tree in post-order and keep finished sub trees in a union
+        find structure, where the representative of each set remembers the
+        ancestor whose sub tree is being walked. Once both values of a pair
+        are finished, that ancestor of the value finished first is the
+        answer.
+        '''
+        pairs = list(pairs)
+        answers = [None] * len(pairs)
+        resolved = [False] * len(pairs)
+        # value -> indexes of pairs containing it
+        queries = {}
+        for index, (first_value, second_value) in enumerate(pairs):
+            queries.setdefault(first_value, []).append(index)
+            if second_value != first_value:
+                queries.setdefault(second_value, []).append(index)
+        # pairs with a value not in tree are never finished by the walk,
+        # answer them now so they do not hold back the pairs after them,
+        # one pass over tree whatever its shape
+        values = set(tree)
+        for value in list(queries):
+            if value not in values:
+                for index in queries.pop(value):
+                    resolved[index] = True
+
+        # union find over node ids, ids are given when walk reaches a node
+        ids = {}
+        nodes = []
+        parents = []
+        ancestors = []
+
+        def root_of(node_id):
+            root = node_id
+            while parents[root] != root:
+                root = parents[root]
+            while parents[node_id] != root:
+                parents[node_id], node_id = root, parents[node_id]
+            return root
+
+        def enter(node):
+            node_id = len(nodes)
+            nodes.append(node)
+            parents.append(node_id)
+            ancestors.append(node_id)
+            return node_id
+
+        next_index = 0
+        if tree.root is not None:
+            stack = [(tree.root, enter(tree.root), iter((tree.root.left, tree.root.right)))]
+            while stack:
+                node, node_id, children = stack[-1]
+                child = next((c for c in children if c is not None), None)
+                if child is not None:
+                    stack.append((child, enter(child), iter((child.left, child.right))))
+                    continue
+                # node is finished
+                stack.pop()
+                # lazily deleted values stay unresolved
+                if not node.deleted:
+                    ids[node.value] = node_id
+                    for index in queries.get(node.value, ()):
+                        first_value, second_value = pairs[index]
+                        other = second_value if first_value == node.value else first_value
+                        other_id = ids.get(other)
+                        if other_id is not None:
+                            answers[index] = nodes[ancestors[root_of(other_id)]]
+                            resolved[index] = True
+                if stack:
+                    parent_id = stack[-1][1]
+                    parents[root_of(node_id)] = root_of(parent_id)
+                    ancestors[root_of(parent_id)] = parent_id
+                while next_index < len(pairs) and resolved[next_index]:
+                    yield answers[next_index]
+                    next_index += 1
+        while next_index < len(pairs):
+            yield answers[next_index]
+            next_index += 1
+
+    @classmethod
+    def track(cls, tree):
+        '''
+        Keep a DynamicLCAIndex of tree up to date as values are inserted,
+        find then answers queries on tree in O(log h). Return the index.
+        '''
+        index = _tracked.get(tree)
+        if index is None:
+            index = _tracked[tree] = DynamicLCAIndex(tree)
+        return index
+
+    @classmethod
+    def untrack(cls, tree):
+        index = _tracked.pop(tree, None)
+        if index is not None:
+            tree.observers.remove(index)
+
+    @classmethod
+    def build(cls, tree):
+        '''
+        Preprocess the given binary search tree, the returned index answers
+        each query in O(1). The index must be built again if tree changes.
+        '''
+        return LCAIndex(tree)
+
+class LCAIndex(object):
+    '''
+    Answer lowest common ancestor queries in O(1) after O(n log n)
+    preprocessing.
+
+    Walk the tree and record every node each time the walk passes it (the
+    Euler tour). The lowest common ancestor of two nodes is the shallowest
+    node recorded between their first occurrences in the tour, a range
+    minimum query answered by a sparse table.
+
+    Each tour entry is encoded as depth * len(tour) + position, so the
+    minimum entry of a range is the shallowest one and the position can be
+    decoded from it.
+    '''
+
+    def __init__(self, tree):
+        self.tour = []
+        self.first = {}
+        depths = []
+        if tree.root is not None:
+            self._walk(tree.root, depths)
+        self._build_table(depths)
+
+    def _walk(self, root, depths):
+        def visit(node, depth):
+            if not node.deleted:
+                self.first.setdefault(node.value, len(self.tour))
+            self.tour.append(node)
+            depths.append(depth)
+
+        # node at stack[i] has depth i, paired with its children to visit
+        visit(root, 0)
+        stack = [(root, iter((root.left, root.right)))]
+        while stack:
+            children = stack[-1][1]
+            child = next((c for c in children if c is not None), None)
+            if child is not None:
+                visit(child, len(stack))
+                stack.append((child, iter((child.left, child.right))))
+            else:
+                stack.pop()
+                if stack:
+                    # walk passes the parent again on the way back
+                    visit(stack[-1][0], len(stack) - 1)
+
+    def _build_table(self, depths):
+        size = len(self.tour)
+        self.stride = size
+        # table[k][i] is the minimum entry of tour[i: i + 2 ** k]
+        level = [depth * size + position for position, depth in enumerate(depths)]
+        self.table = [level]
+        span = 1
+        while span * 2 <= size:
+            level = map(min, level[:-span], level[span:])
+            self.table.append(level)
+            span *= 2
+
+    def __contains__(self, value):
+        return value in self.first
+
+    def find(self, first_value, second_value):
+        '''
+        Find lowest common ancestor of the two values, return None if any of
+        the values is not in tree.
+        '''
+        first = self.first.get(first_value)
+        second = self.first.get(second_value)
+        if first is None or second is None:
+            return None
+        if second < first:
+            first, second = second, first
+        k = (second - first + 1).bit_length() - 1
+        level = self.table[k]
+        entry = min(level[first], level[second - (1 << k) + 1])
+        return self.tour[entry % self.stride]
+
+class DynamicLCAIndex(object):
+    '''
+    Binary lifting index of a common.BST which stays valid while leaves are
+    added, each new leaf costs O(log h).
+
+    Rotations, deletes and rebuilds move inner nodes and leave the index
+    stale. Queries then walk the tree instead, and the index is built again
+    in O(n) once those walks visited n nodes. Rebuilding at most doubles the
+    cost of the walks whatever the shape of the tree, and the index pays off
+    for plain trees, which mostly grow by leaves.
+    '''
+
+    def __init__(self, tree):
+        # tree keeps its observers alive, not the other way round
+        self.tree = weakref.ref(tree)
+        # nodes visited by walks since index became stale
+        self.walked = 0
+        self._rebuild()
+        tree.observers.append(self)
+
+    def node_added(self, node):
+        if not self.stale:
+            self._add(node)
+
+    def tree_changed(self):
+        if not self.stale:
+            self.stale = True
+            self.walked = 0
+
+    def _walk(self, first_value, second_value):
+        # same as LowestCommonAncestor._find_in_tree, also count the nodes
+        # visited
+        if second_value < first_value:
+            first_value, second_value = second_value, first_value
+        node = self.tree().root
+        visited = 0
+        while node is not None:
+            visited += 1
+            if node.value > second_value:
+                node = node.left
+            elif node.value < first_value:
+                node = node.right
+            else:
+                break
+        if node is None:
+            return None, visited
+        for value in (first_value, second_value):
+            found = node
+            while found is not None and found.value != value:
+                visited += 1
+                found = found.left if value < found.value else found.right
+            if found is None or found.deleted:
+                return None, visited
+        return node, visited
+
+    def _rebuild(self):
+        # value -> node
+        self.nodes = {}
+        # node -> depth
+        self.depths = {}
+        # node -> its ancestors 1, 2, 4, ... levels up
+        self.jumps = {}
+        # parents come before children in pre-order
+        root = self.tree().root
+        stack = [root] if root is not None else []
+        while stack:
+            node = stack.pop()
+            self._add(node)
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+        self.stale = False
+
+    def _add(self, node):
+        self.nodes[node.value] = node
+        parent = node.parent
+        if parent is None:
+            self.depths[node] = 0
+            self.jumps[node] = []
+            return
+        self.depths[node] = self.depths[parent] + 1
+        jumps = [parent]
+        # ancestor 2 ** (k + 1) levels up is 2 ** k levels above the one
+        # 2 ** k levels up
+        while True:
+            above = self.jumps[jumps[-1]]
+            if len(above) < len(jumps):
+                break
+            jumps.append(above[len(jumps) - 1])
+        self.jumps[node] = jumps
+
+    def find(self, first_value, second_value):
+        '''
+        Find lowest common ancestor of the two values, return None if any of
+        the values is not in tree.
+        '''
+        return self._lift(first_value, second_value)[0]
+
+    def _lift(self, first_value, second_value):
+        # return the answer and the number of jumps taken, or nodes walked
+        # if the index is stale, to find it
+        if self.stale:
+            node, visited = self._walk(first_value, second_value)
+            self.walked += visited
+            tree = self.tree()
+            if self.walked >= tree.count + tree.tombstones:
+                self._rebuild()
+            return node, visited
+        first = self.nodes.get(first_value)
+        second = self.nodes.get(second_value)
+        if first is None or second is None or first.deleted or second.deleted:
+            return None, 0
+        if self.depths[first] < self.depths[second]:
+            first, second = second, first
+        # lift the deeper node to the same depth
+        difference = self.depths[first] - self.depths[second]
+        taken = 0
+        k = 0
+        while difference:
+            if difference & 1:
+                first = self.jumps[first][k]
+                taken += 1
+            difference >>= 1
+            k += 1
+        if first is second:
+            return first, taken
+        # lift both as far as they stay different
+        for k in range(len(self.jumps[first]) - 1, -1, -1):
+            jumps = self.jumps[first]
+            if k < len(jumps) and jumps[k] is not self.jumps[second][k]:
+                first = jumps[k]
+                second = self.jumps[second][k]
+                taken += 1
+        return self.jumps[first][0], taken + 1
 
 if __name__ == '__main__':
     import sys
@@ -127,3 +544,10 @@ if __name__ == '__main__':
     bst = BST([7, 2, 1, 5, 4, 3, 6, 12, 9, 13, 8, 11, 10, 15, 14, 16])
     _node = LowestCommonAncestor.find(bst, 3, 6)
     print _node.value
+    index = LowestCommonAncestor.build(bst)
+    print index.find(8, 10).value
+    for _node in LowestCommonAncestor.find_many(bst, [(3, 6), (8, 10), (1, 16)]):
+        print _node.value
+    LowestCommonAncestor.track(bst)
+    bst.insert(17)
+    print LowestCommonAncestor.find(bst, 14, 17).value
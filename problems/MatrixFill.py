@@ -184,6 +184,215 @@ constant number of passes over the original matrix and only uses O(1) space
 variables).
 '''
 
+import binascii
+import mmap
+import multiprocessing
+import os
+import shutil
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# header of binary matrix files: magic, rows and columns. Rows follow, each
+# packed into (columns + 7) // 8 bytes, first column in the highest bit.
+BINARY_HEADER = struct.Struct('<4sII')
+BINARY_MAGIC = b'MFBM'
+
+# bytes of a file mapped at once when filling a matrix stored in file
+MAPPING_WINDOW = 1 << 24
+
+def _unpack_row(data):
+    return int(binascii.hexlify(data), 16) if data else 0
+
+def _pack_row(row, width):
+    return binascii.unhexlify('%0*x' % (width * 2, row)) if width else b''
+
+# matrix scanned by worker processes of MatrixFill.fill_parallel, inherited
+# from the parent process when workers are forked
+_worker_matrix = None
+
+def _init_worker(matrix):
+    global _worker_matrix
+    _worker_matrix = matrix
+
+def _scan_rows(bounds):
+    '''
+    Scan rows in [low, high) of the worker matrix, return flags of rows
+    containing 1 and indexes of columns containing 1.
+    '''
+    low, high = bounds
+    rows = bytearray(high - low)
+    columns = set()
+    for i in range(low, high):
+        row = _worker_matrix[i]
+        if 1 not in row:
+            continue
+        rows[i - low] = 1
+        # list.index scans in C, only rows containing 1 are walked
+        j = row.index(1)
+        while True:
+            columns.add(j)
+            try:
+                j = row.index(1, j + 1)
+            except ValueError:
+                break
+    return rows, columns
+
+class BitMatrix(object):
+    '''
+    Boolean matrix packed one bit per entry, each row is a python int.
+    Entry (i, j) is bit (columns - 1 - j) of row i, so a row reads the same
+    as its binary representation, e.g. row '00101' is int('00101', 2).
+    '''
+
+    def __init__(self, rows, columns):
+        self.rows = list(rows)
+        self.columns = columns
+
+    @classmethod
+    def from_lists(cls, matrix):
+        columns = len(matrix[0]) if matrix else 0
+        return cls([int(''.join(['1' if e else '0' for e in row]) or '0', 2)
+                    for row in matrix], columns)
+
+    @classmethod
+    def from_strings(cls, rows):
+        '''
+        Read rows in command line format, e.g. ['00001', '10000'].
+        '''
+        columns = len(rows[0]) if rows else 0
+        return cls([int(row or '0', 2) for row in rows], columns)
+
+    def to_strings(self):
+        if self.columns == 0:
+            return ['' for _ in self.rows]
+        pattern = '0%db' % self.columns
+        return [format(row, pattern) for row in self.rows]
+
+    def to_lists(self):
+        return [[int(e) for e in row] for row in self.to_strings()]
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Read matrix from a file in binary layout, see BINARY_HEADER.
+        '''
+        with open(path, 'rb') as f:
+            magic, rows, columns = BINARY_HEADER.unpack(f.read(BINARY_HEADER.size))
+            if magic != BINARY_MAGIC:
+                raise ValueError('not a binary matrix file: %s' % path)
+            width = (columns + 7) // 8
+            padding = width * 8 - columns
+            return cls([_unpack_row(f.read(width)) >> padding for _ in range(rows)], columns)
+
+    def save(self, path):
+        '''
+        Write matrix to a file in binary layout, see BINARY_HEADER.
+        '''
+        width = (self.columns + 7) // 8
+        padding = width * 8 - self.columns
+        with open(path, 'wb') as f:
+            f.write(BINARY_HEADER.pack(BINARY_MAGIC, len(self.rows), self.columns))
+            for row in self.rows:
+                f.write(_pack_row(row << padding, width))
+
+    def get(self, i, j):
+        return (self.rows[i] >> (self.columns - 1 - j)) & 1
+
+    def __eq__(self, other):
+        return (isinstance(other, BitMatrix) and self.columns == other.columns
+                and self.rows == other.rows)
+
+    def __ne__(self, other):
+        return not self == other
+
+class FilledMatrix(object):
+    '''
+    Result of filling a sparse matrix, described by the rows and columns
+    which are filled with 1, instead of all m x n entries.
+    '''
+
+    def __init__(self, filled_rows, filled_columns, rows, columns):
+        self.filled_rows = filled_rows
+        self.filled_columns = filled_columns
+        self.rows = rows
+        self.columns = columns
+
+    def is_set(self, i, j):
+        return i in self.filled_rows or j in self.filled_columns
+
+    def to_dense(self):
+        column_row = [0] * self.columns
+        for j in self.filled_columns:
+            column_row[j] = 1
+        full_row = [1] * self.columns
+        return [full_row[:] if i in self.filled_rows else column_row[:]
+                for i in range(self.rows)]
+
+class IncrementalMatrixFill(object):
+    '''
+    Keep the result of filling a matrix up to date while its entries change.
+
+    Count 1s on every row and column of the input matrix, entry (i, j) of
+    the result is 1 if row i or column j has any. Changing one input entry
+    updates two counts in O(1), the result is read from the counts, so
+    nothing is rewritten.
+    '''
+
+    def __init__(self, matrix):
+        self.rows = len(matrix)
+        self.columns = len(matrix[0]) if matrix else 0
+        self.row_counts = [0] * self.rows
+        self.column_counts = [0] * self.columns
+        # coordinates of 1 entries in input matrix
+        self.cells = set()
+        for i, row in enumerate(matrix):
+            for j, entry in enumerate(row):
+                if entry == 1:
+                    self.set(i, j)
+
+    def set(self, i, j):
+        '''
+        Set input entry (i, j) to 1, return False if it already is.
+        '''
+        if (i, j) in self.cells:
+            return False
+        self.cells.add((i, j))
+        self.row_counts[i] += 1
+        self.column_counts[j] += 1
+        return True
+
+    def clear(self, i, j):
+        '''
+        Set input entry (i, j) to 0, return False if it already is.
+        '''
+        if (i, j) not in self.cells:
+            return False
+        self.cells.remove((i, j))
+        self.row_counts[i] -= 1
+        self.column_counts[j] -= 1
+        return True
+
+    def get(self, i, j):
+        '''
+        Get entry (i, j) of the filled matrix.
+        '''
+        return 1 if self.row_counts[i] or self.column_counts[j] else 0
+
+    def row(self, i):
+        '''
+        Get row i of the filled matrix.
+        '''
+        if self.row_counts[i]:
+            return [1] * self.columns
+        return [1 if count else 0 for count in self.column_counts]
+
+    def to_matrix(self):
+        return [self.row(i) for i in range(self.rows)]
+
 class MatrixFill(object):
     '''
     Implement matrix fill problem
@@ -258,7 +467,20 @@ class MatrixFill(object):
         return matrix
 
     @classmethod
-    def fill(cls, matrix):
+    def fill(cls, matrix, backend='python'):
+        '''
+        Fill matrix in place and return it. With backend 'numpy', matrix
+        should be a numpy array (bool, uint8 or other integer type), rows
+        and columns are reduced and filled by vectorized operations.
+
+        A BitMatrix is always filled by word level operations on its rows.
+        '''
+        if isinstance(matrix, BitMatrix):
+            return cls._fill_bits(matrix)
+        if backend == 'numpy':
+            return cls._fill_numpy(matrix)
+        if backend != 'python':
+            raise ValueError('unknown backend: %r' % backend)
         aux_row, matrix = cls._find_aux_row(matrix)
         if aux_row == -1:
             return matrix
@@ -267,6 +489,194 @@ class MatrixFill(object):
         matrix = cls._fill_column(aux_row, matrix)
         return matrix
 
+    @classmethod
+    def fill_sparse(cls, cells, rows, columns):
+        '''
+        Fill a rows x columns matrix given by coordinates (i, j) of its 1
+        entries, in O(nnz) without touching the 0 entries. Return a
+        FilledMatrix, call its to_dense for the list of lists.
+        '''
+        filled_rows = set()
+        filled_columns = set()
+        for i, j in cells:
+            filled_rows.add(i)
+            filled_columns.add(j)
+        return FilledMatrix(filled_rows, filled_columns, rows, columns)
+
+    @classmethod
+    def fill_csr(cls, indptr, indices, columns):
+        '''
+        Fill a matrix in compressed sparse row format, columns of 1 entries
+        on row i are indices[indptr[i]:indptr[i + 1]]. Cost O(m + nnz),
+        return a FilledMatrix.
+        '''
+        filled_rows = set(i for i in range(len(indptr) - 1) if indptr[i + 1] > indptr[i])
+        return FilledMatrix(filled_rows, set(indices), len(indptr) - 1, columns)
+
+    @classmethod
+    def fill_parallel(cls, matrix, workers=None):
+        '''
+        Fill matrix, a list of lists, in place with a pool of worker
+        processes and return it.
+
+        Rows are split into chunks, workers find out which rows and columns
+        of each chunk contain 1, then the results are merged into one
+        column mask. Workers inherit the matrix when they are forked, so
+        chunks are not copied to them. Rows are filled in the parent by
+        whole row copies, which run in C.
+        '''
+        if not matrix:
+            return matrix
+        workers = workers or multiprocessing.cpu_count()
+        chunk = max(1, -(-len(matrix) // (workers * 4)))
+        bounds = [(low, min(low + chunk, len(matrix))) for low in range(0, len(matrix), chunk)]
+        if workers == 1:
+            _init_worker(matrix)
+            try:
+                results = [_scan_rows(b) for b in bounds]
+            finally:
+                _init_worker(None)
+        else:
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(matrix,))
+            try:
+                results = pool.map(_scan_rows, bounds)
+            finally:
+                pool.close()
+                pool.join()
+
+        columns = len(matrix[0])
+        column_row = [0] * columns
+        for _, chunk_columns in results:
+            for j in chunk_columns:
+                column_row[j] = 1
+        full_row = [1] * columns
+        for (low, _), (rows, _) in zip(bounds, results):
+            for offset, contain_1 in enumerate(rows):
+                matrix[low + offset] = full_row[:] if contain_1 else column_row[:]
+        return matrix
+
+    @classmethod
+    def fill_file(cls, path, output=None, binary=False):
+        '''
+        Fill matrix stored in file at path, in place if output is None, else
+        write the result to file at output.
+
+        The file is either text with one row per line, like '00101', lines
+        end with '\n' or all with '\r\n', or in binary layout (see BINARY_HEADER) if binary is True. It is read in
+        two sequential passes through memory mapped windows of at most
+        MAPPING_WINDOW bytes, and only the mask of columns containing 1
+        (O(n) bits) is kept in between, so memory use does not grow with
+        the number of rows.
+        '''
+        with open(path, 'rb' if output else 'r+b') as f:
+            size = os.fstat(f.fileno()).st_size
+            if binary:
+                header = f.read(BINARY_HEADER.size)
+                magic, rows, columns = BINARY_HEADER.unpack(header)
+                if magic != BINARY_MAGIC:
+                    raise ValueError('not a binary matrix file: %s' % path)
+                offset = BINARY_HEADER.size
+                width = record = (columns + 7) // 8
+                full = ((1 << columns) - 1) << (width * 8 - columns)
+            else:
+                header = b''
+                offset = 0
+                line = f.readline()
+                newline = b'\r\n' if line.endswith(b'\r\n') else b'\n'
+                columns = width = len(line) - len(newline) if line.endswith(newline) else len(line)
+                # each row is followed by a new line, except maybe the last
+                record = width + len(newline)
+                rows = (size + len(newline)) // record
+                full = (1 << columns) - 1
+                # check the last row too, before anything is written
+                if width and size not in (rows * record, rows * record - len(newline)):
+                    raise ValueError('rows of %s have different length' % path)
+            if width == 0 or rows == 0:
+                if output:
+                    shutil.copyfile(path, output)
+                return
+            access = mmap.ACCESS_READ if output else mmap.ACCESS_WRITE
+
+            # first pass, find out columns containing 1
+            columns_mask = 0
+            for mapping, start, count in cls._map_rows(f, offset, record, rows, size, access):
+                for position in xrange(start, start + count * record, record):
+                    row = mapping[position:position + width]
+                    if binary:
+                        columns_mask |= _unpack_row(row)
+                    else:
+                        if position + width < len(mapping) and mapping[position + width:position + record] != newline:
+                            raise ValueError('rows of %s have different length' % path)
+                        columns_mask |= int(row, 2)
+                mapping.close()
+
+            if binary:
+                column_row = _pack_row(columns_mask, width)
+                full_row = _pack_row(full, width)
+            else:
+                column_row = format(columns_mask, '0%db' % width).encode('ascii')
+                full_row = format(full, '0%db' % width).encode('ascii')
+            zero_row = (b'\0' if binary else b'0') * width
+
+            # second pass, fill rows
+            out = open(output, 'wb') if output else None
+            try:
+                if out is not None:
+                    out.write(header)
+                for mapping, start, count in cls._map_rows(f, offset, record, rows, size, access):
+                    for position in xrange(start, start + count * record, record):
+                        row = full_row if mapping[position:position + width] != zero_row else column_row
+                        if out is None:
+                            mapping[position:position + width] = row
+                        else:
+                            out.write(row)
+                            out.write(mapping[position + width:position + record])
+                    mapping.close()
+            finally:
+                if out is not None:
+                    out.close()
+
+    @classmethod
+    def _map_rows(cls, f, offset, record, rows, size, access):
+        '''
+        Map rows of file f, each record bytes starting from offset, in
+        windows. Generate (mapping, start, count) for each window, the window
+        holds count rows, the first one at position start of the mapping.
+        '''
+        per_window = max(1, MAPPING_WINDOW // record)
+        for first in xrange(0, rows, per_window):
+            count = min(per_window, rows - first)
+            begin = offset + first * record
+            # mapping must start at a multiple of allocation granularity
+            aligned = begin - begin % mmap.ALLOCATIONGRANULARITY
+            end = min(size, begin + count * record)
+            mapping = mmap.mmap(f.fileno(), end - aligned, access=access, offset=aligned)
+            yield mapping, begin - aligned, count
+
+    @classmethod
+    def _fill_bits(cls, matrix):
+        # a row contains 1 if it is nonzero, columns containing 1 are the
+        # OR of all rows
+        full = (1 << matrix.columns) - 1
+        columns = 0
+        for row in matrix.rows:
+            columns |= row
+        matrix.rows = [full if row else columns for row in matrix.rows]
+        return matrix
+
+    @classmethod
+    def _fill_numpy(cls, matrix):
+        if numpy is None:
+            raise ImportError('numpy backend requires numpy')
+        # a list is converted to a new array, which is filled and returned
+        matrix = numpy.asarray(matrix)
+        # O(m + n) space for the reductions, buys vectorized passes
+        rows = matrix.any(axis=1)
+        columns = matrix.any(axis=0)
+        matrix[rows] = 1
+        matrix[:, columns] = 1
+        return matrix
+
 if __name__ == '__main__':
 
     import sys
@@ -287,7 +697,15 @@ if __name__ == '__main__':
     if len(sys.argv) < 2:
         print '''
         Usage: python MatrixFill.py 00001 10000 00100 11011
+               python MatrixFill.py --file [--binary] input [output]
         '''
+    if sys.argv[1:2] == ['--file']:
+        args = sys.argv[2:]
+        binary = '--binary' in args
+        if binary:
+            args.remove('--binary')
+        MatrixFill.fill_file(args[0], args[1] if len(args) > 1 else None, binary=binary)
+        sys.exit(0)
     matrix = read_matrix(sys.argv[1:])
     print 'Input Matrix: '
     print_matrix(matrix)
@@ -0,0 +1,78 @@
+'''
+Created on: Oct 18, 2026
+
+@author: qwang
+
+Check problems/CircularSortedArray.py against a linear scan, on random
+rotated arrays with lots of duplicated values.
+
+Usage: python -m unittest discover tests
+'''
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'problems'))
+
+from CircularSortedArray import find, find_many, find_rotation_point, numpy
+
+def rotated_arrays(rand, count):
+    '''
+    Generate random sorted arrays rotated at a random point, small value
+    ranges make lots of duplicates.
+    '''
+    for _ in range(count):
+        size = rand.randrange(0, 40)
+        values = sorted(rand.randrange(rand.choice([2, 5, 100])) for _ in range(size))
+        shift = rand.randrange(size) if size else 0
+        yield values[shift:] + values[:shift]
+
+def linear_find(array, elem):
+    return [index for index, value in enumerate(array) if value == elem]
+
+class CircularSortedArrayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rand = random.Random(0)
+
+    def check_found(self, array, elem, index):
+        if elem in array:
+            self.assertIn(index, linear_find(array, elem))
+        else:
+            self.assertEqual(index, -1)
+
+    def test_find_rotation_point(self):
+        for array in rotated_arrays(self.rand, 2000):
+            pivot = find_rotation_point(array)
+            self.assertTrue(0 <= pivot <= max(0, len(array) - 1))
+            self.assertEqual(array[pivot:] + array[:pivot], sorted(array))
+
+    def test_find(self):
+        for array in rotated_arrays(self.rand, 1000):
+            pivot = find_rotation_point(array)
+            for elem in range(-1, 101):
+                self.check_found(array, elem, find(array, elem))
+                self.check_found(array, elem, find(array, elem, pivot))
+
+    def test_find_unrotated(self):
+        self.assertEqual(find([], 1), -1)
+        self.assertEqual(find([1, 2, 3], 3), 2)
+        self.assertEqual(find([1, 1, 1, 0, 1], 0), 3)
+
+    def test_find_many(self):
+        backends = ['python'] + (['numpy'] if numpy is not None else [])
+        for array in rotated_arrays(self.rand, 500):
+            elems = [self.rand.randrange(-1, 101) for _ in range(30)]
+            for backend in backends:
+                result = list(find_many(array, elems, backend))
+                self.assertEqual(len(result), len(elems))
+                for elem, index in zip(elems, result):
+                    self.check_found(array, elem, index)
+
+    def test_find_many_unknown_backend(self):
+        self.assertRaises(ValueError, find_many, [1, 2], [1], 'fortran')
+
+if __name__ == '__main__':
+    unittest.main()